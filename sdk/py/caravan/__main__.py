@@ -1,5 +1,7 @@
 import json
 import math
+from contextlib import ExitStack
+from pathlib import Path
 from typing import TYPE_CHECKING
 import runpy
 
@@ -18,19 +20,30 @@ from caravan.settings import USER_CONFIG_DIR
 
 from .cli import version_option, caravan_argument, parent_option
 from .factory import Factory
-from .packages import PackageType
+from .history import EventIndex
+from .metadata import WALLET_METADATA
+from .packages import MANIFESTS, PackageType
+from .signatures import SIGNATURE_CACHE
+from .simulation import SIMULATION_CACHE, SimulationSession
 
 if TYPE_CHECKING:
     from ape.api.accounts import AccountAPI
     from ape.api.networks import NetworkAPI
 
     from .main import Caravan
+    from .messages import Execute
+    from .queue import QueueItem
 
 
 @click.group()
 def cli():
     """Manage Caravan wallets (https://caravan.box)"""
 
+    # NOTE: Skip re-verifying signatures that were already checked in previous invocations
+    SIGNATURE_CACHE.persist()
+    # NOTE: Skip re-fetching wallet metadata that was already fetched in previous invocations
+    WALLET_METADATA.persist()
+
 
 # TODO: Add to ape?
 def _get_accounts(ctx, param, values):
@@ -396,10 +409,27 @@ def queue():
 @queue.command(cls=ConnectedProviderCommand)
 @ape_cli_context()
 @account_option("--proposer")
-@click.option("--submit", is_flag=True, default=False)
+@click.option(
+    "--submit",
+    is_flag=True,
+    default=False,
+    help="Submit each script's batch on-chain, one transaction per script (in order)",
+)
 @click.option("--stop-at", default=None)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Simulate every script again, even if unchanged since the last run",
+)
+@click.option(
+    "--autosign",
+    is_flag=True,
+    default=False,
+    help="Unlock local signers once, and sign every batch w/o confirming each one",
+)
 @caravan_argument()
-def run(cli_ctx, network, proposer, submit, stop_at, caravan):
+def run(cli_ctx, network, proposer, submit, stop_at, no_cache, autosign, caravan):
     """
     Run all scripts to ensure local Wallet queue matches
 
@@ -408,6 +438,10 @@ def run(cli_ctx, network, proposer, submit, stop_at, caravan):
     When executed using a fork network, it will only perform a simulated validation of the script.
     When executed using a live network, it will publish the transaction ONLY IF the transaction at
     that msghash does not exist in the off-chain queue.
+    Scripts that have not changed (and have the same parent) since they were last simulated are
+    not simulated again, unless `--no-cache` is given.
+    Each local signer is asked to sign every new batch, unless `--autosign` is given (then each
+    signer is unlocked only once, up front).
 
     To enable this, scripts under `scripts/` must be properly named, and all use
     `caravan.cli.propose_from_simulation`.
@@ -433,22 +467,61 @@ def run(cli_ctx, network, proposer, submit, stop_at, caravan):
     parent = caravan.head
     cli_ctx.logger.info(f"Current head: {parent.to_0x_hex()}")
 
-    while available_queue_scripts and parent[:hashlen] != stop_at:
-        if not (script := available_queue_scripts.pop(parent[:hashlen], None)):
-            raise click.UsageError(
-                f"No command `q{parent[:hashlen]}.py` in `scripts/`."
-            )
-
-        elif not (cmd := runpy.run_path(str(script), run_name=script.stem).get("cli")):
-            raise click.UsageError(f"No command `cli` detected in {script}.")
-
-        cli_ctx.logger.info(f"Running '{script}':\n\n  {cmd.help}\n")
-        # NOTE: This matches signature from `caravan.cli:propose_from_simulation`
-        parent = cmd.callback.__wrapped__(
-            cli_ctx, network, proposer, parent, submit, caravan
-        )
-
-        cli_ctx.logger.success(f"New head set: {parent.to_0x_hex()}")
+    if not no_cache:
+        SIMULATION_CACHE.persist()
+
+    batches: list["Execute"] = []
+    # NOTE: Simulate all scripts in the same fork, one after another (only if needed)
+    with ExitStack() as stack:
+        session = None
+        while available_queue_scripts and parent[:hashlen] != stop_at:
+            if not (script := available_queue_scripts.pop(parent[:hashlen], None)):
+                raise click.UsageError(
+                    f"No command `q{parent[:hashlen]}.py` in `scripts/`."
+                )
+
+            elif not no_cache and (
+                batch := SIMULATION_CACHE.get(caravan, script.read_bytes(), parent)
+            ):
+                cli_ctx.logger.info(f"Script '{script}' unchanged, skipping simulation")
+                if session is not None:
+                    # NOTE: So the next scripts still see its effects
+                    session.apply(batch)
+
+            elif not (
+                cmd := runpy.run_path(str(script), run_name=script.stem).get("cli")
+            ):
+                raise click.UsageError(f"No command `cli` detected in {script}.")
+
+            else:
+                if session is None:
+                    session = stack.enter_context(SimulationSession(caravan))
+                    # NOTE: Apply all skipped batches so far, since this script needs them
+                    for skipped_batch in batches:
+                        session.apply(skipped_batch)
+
+                cli_ctx.logger.info(f"Running '{script}':\n\n  {cmd.help}\n")
+                # NOTE: This matches signature from `caravan.cli:propose_from_simulation`
+                cmd.callback.__wrapped__(
+                    cli_ctx, network, proposer, parent, submit, caravan, session=session
+                )
+                batch = session.batches[-1]
+                SIMULATION_CACHE.add(script.read_bytes(), batch)
+
+            batches.append(batch)
+            parent = batch.hash
+            cli_ctx.logger.success(f"New head set: {parent.to_0x_hex()}")
+
+    # NOTE: Only publish batches that are not already in the queue
+    if new_batches := [batch for batch in batches if batch not in caravan.queue]:
+        if autosign:
+            caravan.unlock_signers(autosign=True)
+
+        caravan.stage_many(new_batches)
+
+    if submit:
+        for batch in batches:
+            caravan.commit(batch, sender=proposer)
 
     cli_ctx.logger.success("All script executed!")
 
@@ -458,18 +531,27 @@ def run(cli_ctx, network, proposer, submit, stop_at, caravan):
 def status(caravan: "Caravan"):
     """View the current state of the Wallet's off-chain queue"""
 
+    # NOTE: Only fetch on-chain state once
+    state = caravan.state
+    items: list[tuple[int, "QueueItem"]] = []
+
     def traverse_queue(parent: HexBytes, depth: int = 0):
         for item in caravan.queue.children(parent):
-            click.echo(
-                f"{'  ' * depth}﹂{item}: ({item.confirmations}/{caravan.threshold})"
-            )
-            for field, value in item.message.render().items():
-                click.echo(f"{'  ' * depth}  {field}: {value}")
+            items.append((depth, item))
             traverse_queue(item.hash, depth=depth + 1)
 
-    current_head = caravan.head
-    click.echo(f"{current_head.hex()}: (on-chain)")
-    traverse_queue(current_head)
+    traverse_queue(state.head)
+    # NOTE: Fetch on-chain approvals for all items at once
+    approvals = caravan.get_onchain_approvals(
+        (item.hash for _, item in items), state=state
+    )
+
+    click.echo(f"{state.head.hex()}: (on-chain)")
+    for depth, item in items:
+        confirmations = len(set(approvals[item.hash]) | set(item.signatures))
+        click.echo(f"{'  ' * depth}﹂{item}: ({confirmations}/{state.threshold})")
+        for field, value in item.message.render().items():
+            click.echo(f"{'  ' * depth}  {field}: {value}")
 
 
 @queue.command(cls=ConnectedProviderCommand)
@@ -491,6 +573,128 @@ def merge(submitter: "AccountAPI", caravan: "Caravan", new_head: HexBytes):
     caravan.merge(new_head, sender=submitter)
 
 
+@queue.command(name="import")
+@click.argument("source", type=click.Path(exists=True, path_type=Path))
+@click.argument("destination", type=click.Path(path_type=Path))
+def import_queue(source: Path, destination: Path):
+    """
+    Copy all messages from queue SOURCE into queue DESTINATION
+
+    Either queue can be a folder, a zip archive (`*.zip`) or a SQLite database (`*.db`).
+    Use this to migrate your local queue into a database, or to bundle it for sharing.
+    """
+    from .storage import QueueStorage, migrate
+
+    num_items = migrate(
+        QueueStorage.from_path(source), QueueStorage.from_path(destination)
+    )
+    click.secho(f"Imported {num_items} message(s) into '{destination}'", fg="green")
+
+
+@queue.command(cls=ConnectedProviderCommand)
+def gc(network: "NetworkAPI"):
+    """
+    Delete stale messages from the off-chain queue of all tracked Wallets
+
+    Messages are stale if they have already been executed on-chain (or were superseded by a
+    message that was executed instead).
+    """
+    from .main import Caravan
+    from .queue import QueueManager
+
+    total_items = total_bytes = 0
+    for wallet_file in USER_CONFIG_DIR.glob("*.json"):
+        if network.chain_id not in json.loads(wallet_file.read_text()):
+            continue
+
+        caravan = Caravan(wallet_file.stem)
+        # NOTE: `caravan.queue` skips older versions, but messages executed before a migration
+        #       (including the migration itself) are still stored under those versions' domains
+        queue = QueueManager.load(
+            base=caravan.head,
+            domains=[caravan.get_eip712_domain(version) for version in MANIFESTS],
+        )
+        items_deleted, bytes_reclaimed = queue.compact()
+        if items_deleted:
+            click.echo(
+                f"{wallet_file.stem}: deleted {items_deleted} message(s) "
+                f"({bytes_reclaimed} bytes)"
+            )
+
+        total_items += items_deleted
+        total_bytes += bytes_reclaimed
+
+    click.secho(
+        f"Deleted {total_items} stale message(s), reclaiming {total_bytes} bytes",
+        fg="green",
+    )
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@click.option(
+    "--event",
+    "events",
+    multiple=True,
+    type=click.Choice(EventIndex.EVENTS),
+    help="Only show these events (defaults to all)",
+)
+@click.option("--from-block", type=int, default=None)
+@click.option("--to-block", type=int, default=None)
+@click.option(
+    "--where",
+    multiple=True,
+    help="Only show events where argument has value (e.g. `--where target=0x...`)",
+)
+@click.option(
+    "--no-update",
+    is_flag=True,
+    default=False,
+    help="Skip indexing new events before querying",
+)
+@caravan_argument()
+def history(
+    network: "NetworkAPI",
+    events: list[str],
+    from_block: int | None,
+    to_block: int | None,
+    where: list[str],
+    no_update: bool,
+    caravan: "Caravan",
+):
+    """View past events emitted by Wallet"""
+
+    arguments = {}
+    for condition in where:
+        if "=" not in condition:
+            raise click.UsageError(f"Condition '{condition}' must be like 'name=value'")
+
+        name, value = condition.split("=", 1)
+        try:
+            # NOTE: e.g. `success=true` or `value=100`
+            arguments[name] = json.loads(value)
+
+        except json.JSONDecodeError:
+            arguments[name] = value
+
+    index = EventIndex()
+    if not no_update:
+        index.update(caravan)
+
+    for event in index.query(
+        network.chain_id,
+        caravan.address,
+        events=events,
+        start_block=from_block,
+        stop_block=to_block,
+        **arguments,
+    ):
+        args = ", ".join(f"{k}={v}" for k, v in event["arguments"].items())
+        click.echo(
+            f"[{event['block_number']}:{event['log_index']}] "
+            f"{event['event_name']}({args})"
+        )
+
+
 @cli.group()
 def sudo():
     """Manage the system contracts [ADVANCED]"""
@@ -0,0 +1,68 @@
+import atexit
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from .settings import USER_CACHE_DIR
+
+
+class PersistedCache:
+    """
+    Base of the process-wide caches, stored as a dict of JSON-compatible entries.
+
+    Optionally, a cache can be persisted to disk (see ``persist``), so that entries are loaded
+    from ``path`` and saved back to it on exit (if modified), and can be re-used by the next
+    process.
+    """
+
+    # NOTE: Where `persist` loads and saves entries, if no other path is given
+    DEFAULT_PATH: Path = USER_CACHE_DIR / ".cache.json"
+
+    def __init__(self):
+        self.path: Path | None = None
+
+        self._cache: Any = {}
+        self._lock = threading.Lock()
+        self._modified = False
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._modified = True
+
+    def _load(self, entries: Any):
+        for key, entry in entries.items():
+            # NOTE: Don't override (more recent) entries already in memory
+            self._cache.setdefault(key, entry)
+
+    def _dump(self) -> Any:
+        return dict(self._cache)
+
+    def persist(self, path: Path | None = None):
+        """Load entries from ``path`` (defaults to ``DEFAULT_PATH``), and save them on exit."""
+
+        if self.path is None:
+            atexit.register(self.save)
+
+        self.path = path = path or self.DEFAULT_PATH
+        if not path.exists():
+            return
+
+        entries = json.loads(path.read_text())
+        with self._lock:
+            self._load(entries)
+
+    def save(self):
+        if self.path is None or not self._modified:
+            return
+
+        with self._lock:
+            entries = self._dump()
+            self._modified = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(entries))
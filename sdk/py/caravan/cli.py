@@ -21,6 +21,8 @@ if TYPE_CHECKING:
 
     from ape.api import AccountAPI, NetworkAPI
 
+    from .simulation import SimulationSession
+
 
 def version_option():
     def _convert_version(ctx, _param, value):
@@ -143,13 +145,14 @@ def propose_from_simulation():
             parent: HexBytes | None,
             submit: bool,
             caravan: "Caravan",
+            session: "SimulationSession | None" = None,
         ) -> HexBytes:
-            if network.is_dev and parent is not None:
+            if network.is_dev and parent is not None and session is None:
                 caravan.set_head(parent)
 
             batch = caravan.new_batch(parent=parent)
 
-            with batch.add_from_simulation() as van_account:
+            with batch.add_from_simulation(session=session) as van_account:
                 args: list = list()
                 if len(parameters) >= 1:
                     args.append(van_account)
@@ -160,6 +163,10 @@ def propose_from_simulation():
 
             cli_ctx.logger.info(f"Found {len(batch.calls)} calls in simulation")
 
+            if session is not None:
+                # NOTE: The caller stages (or submits) all batches once the session is over
+                return batch.hash
+
             if submit:
                 batch(sender=proposer)
 
@@ -0,0 +1,252 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ape.types import AddressType, HexBytes, LogFilter
+from ape.utils import ManagerAccessMixin
+from eth_utils import encode_hex, keccak
+
+from .rpc import get_logs
+from .settings import USER_CACHE_DIR
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from ape.types import ContractLog
+
+    from .main import Caravan
+
+
+class EventIndex(ManagerAccessMixin):
+    """
+    Local index of the events emitted by Wallets, stored in a single SQLite database file.
+
+    Each Wallet is indexed incrementally from the last block indexed for it (see ``update``),
+    so the index can be queried (see ``query``) without re-scanning the chain.
+    """
+
+    EVENTS = (
+        "Executed",
+        "SignersRotated",
+        "ModuleUpdated",
+        "ImplementationUpgraded",
+        "AdminGuardUpdated",
+        "ExecuteGuardUpdated",
+    )
+
+    # NOTE: The most recent blocks are rolled back and re-indexed on every update, in case of a reorg
+    REORG_DEPTH: int = 12
+    # NOTE: SQLite's JSON functions read larger integers as (lossy) floats, so they are stored as
+    #       strings instead (see `_encode_arguments`)
+    MAX_JSON_INT: int = 2**63 - 1
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        chain_id INTEGER NOT NULL,
+        wallet TEXT NOT NULL,
+        block_number INTEGER NOT NULL,
+        log_index INTEGER NOT NULL,
+        transaction_hash TEXT NOT NULL,
+        event_name TEXT NOT NULL,
+        arguments TEXT NOT NULL,
+        PRIMARY KEY (chain_id, wallet, block_number, log_index)
+    );
+    CREATE INDEX IF NOT EXISTS events_name ON events(chain_id, wallet, event_name);
+    CREATE TABLE IF NOT EXISTS progress (
+        chain_id INTEGER NOT NULL,
+        wallet TEXT NOT NULL,
+        last_block INTEGER NOT NULL,
+        -- NOTE: Hash of the last block that is not rolled back on update (see `_checkpoint`)
+        last_block_hash TEXT NOT NULL,
+        PRIMARY KEY (chain_id, wallet)
+    );
+    """
+
+    def __init__(self, path: Path = USER_CACHE_DIR / ".history.db"):
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.executescript(self.SCHEMA)
+
+        return self._connection
+
+    def last_block(self, chain_id: int, wallet: AddressType) -> int | None:
+        """The last block indexed for ``wallet`` (or ``None`` if it was never indexed)."""
+
+        row = self.connection.execute(
+            "SELECT last_block FROM progress WHERE chain_id = ? AND wallet = ?",
+            (chain_id, wallet),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _rollback(self, chain_id: int, wallet: AddressType, start_block: int):
+        with self.connection as connection:
+            connection.execute(
+                "DELETE FROM events WHERE chain_id = ? AND wallet = ? AND block_number >= ?",
+                (chain_id, wallet, start_block),
+            )
+            connection.execute(
+                "DELETE FROM progress WHERE chain_id = ? AND wallet = ?",
+                (chain_id, wallet),
+            )
+
+    def update(self, van: "Caravan") -> int:
+        """Index all new events emitted by ``van``, returning the number of events indexed."""
+
+        chain_id, height = self.provider.chain_id, self.chain_manager.blocks.height
+        row = self.connection.execute(
+            "SELECT last_block, last_block_hash FROM progress WHERE chain_id = ? AND wallet = ?",
+            (chain_id, van.address),
+        ).fetchone()
+
+        if row is None:
+            start_block = van.deployment_block
+
+        elif (last_block := row[0]) > height or (
+            self.provider.get_block(self._checkpoint(last_block)).hash
+            != HexBytes(row[1])
+        ):
+            # NOTE: Re-organized deeper than `REORG_DEPTH` (or a reset dev network), start over
+            start_block = van.deployment_block
+            self._rollback(chain_id, van.address, 0)
+
+        else:
+            # NOTE: Roll back the most recent blocks, in case they were re-organized
+            start_block = max(last_block - self.REORG_DEPTH + 1, 0)
+            self._rollback(chain_id, van.address, start_block)
+
+        abis = [getattr(van.contract, name).abi for name in self.EVENTS]
+        log_filter = LogFilter(
+            addresses=[van.address],
+            events=abis,
+            # NOTE: Match any of the events (by `topic0`)
+            topic_filter=[[encode_hex(keccak(text=abi.selector)) for abi in abis]],
+        )
+
+        num_events = 0
+        for last_block, logs in get_logs(
+            self.provider, log_filter, start_block, height
+        ):
+            with self.connection as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            chain_id,
+                            van.address,
+                            log.block_number,
+                            log.log_index,
+                            HexBytes(log.transaction_hash).to_0x_hex(),
+                            log.event_name,
+                            self._encode_arguments(log),
+                        )
+                        for log in logs
+                    ],
+                )
+                # NOTE: Save progress w/ each range, so an interrupted update can resume
+                connection.execute(
+                    "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?)",
+                    (
+                        chain_id,
+                        van.address,
+                        last_block,
+                        self.provider.get_block(
+                            self._checkpoint(last_block)
+                        ).hash.to_0x_hex(),
+                    ),
+                )
+
+            num_events += len(logs)
+
+        return num_events
+
+    def _checkpoint(self, last_block: int) -> int:
+        # NOTE: Shallower reorgs are handled by rolling back the most recent blocks
+        return max(last_block - self.REORG_DEPTH, 0)
+
+    def _encode_value(self, value: Any) -> Any:
+        if isinstance(value, bytes):
+            return HexBytes(value).to_0x_hex()
+
+        elif isinstance(value, (list, tuple)):
+            return [self._encode_value(v) for v in value]
+
+        elif isinstance(value, int) and abs(value) > self.MAX_JSON_INT:
+            return str(value)
+
+        return value
+
+    def _encode_arguments(self, log: "ContractLog") -> str:
+        return json.dumps(
+            {
+                name: self._encode_value(value)
+                for name, value in log.event_arguments.items()
+            }
+        )
+
+    def query(
+        self,
+        chain_id: int,
+        wallet: AddressType,
+        events: "Iterable[str]" = (),
+        start_block: int | None = None,
+        stop_block: int | None = None,
+        **arguments: Any,
+    ) -> "Iterator[dict[str, Any]]":
+        """
+        Yield indexed events emitted by ``wallet`` (in order), optionally filtered by event name,
+        block range (inclusive), and/or by the value of the event's ``arguments``.
+
+        NOTE: String argument values are compared case-insensitively. Integer values too large
+              for SQLite are stored (and returned) as strings.
+        """
+
+        conditions, params = ["chain_id = ?", "wallet = ?"], [chain_id, wallet]
+        if events := list(events):
+            conditions.append(f"event_name IN ({', '.join('?' * len(events))})")
+            params.extend(events)
+
+        if start_block is not None:
+            conditions.append("block_number >= ?")
+            params.append(start_block)
+
+        if stop_block is not None:
+            conditions.append("block_number <= ?")
+            params.append(stop_block)
+
+        for name, value in arguments.items():
+            if isinstance(value, str):
+                # NOTE: So that addresses match regardless of checksum
+                conditions.append("lower(json_extract(arguments, ?)) = lower(?)")
+
+            else:
+                conditions.append("json_extract(arguments, ?) = ?")
+                value = self._encode_value(value)
+
+            params.extend((f"$.{name}", value))
+
+        for (
+            block_number,
+            log_index,
+            txn_hash,
+            event_name,
+            args,
+        ) in self.connection.execute(
+            "SELECT block_number, log_index, transaction_hash, event_name, arguments "
+            f"FROM events WHERE {' AND '.join(conditions)} "
+            "ORDER BY block_number, log_index",
+            params,
+        ):
+            yield dict(
+                block_number=block_number,
+                log_index=log_index,
+                transaction_hash=txn_hash,
+                event_name=event_name,
+                arguments=json.loads(args),
+            )
@@ -1,35 +1,93 @@
 from collections.abc import Iterator
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
 import itertools
+import time
 from typing import TYPE_CHECKING, Any
 
 from ape.contracts import ContractCall, ContractInstance
-from ape.exceptions import AccountsError
-from ape.types import AddressType, HexBytes, MessageSignature
-from ape.types.signatures import recover_signer
+from ape.exceptions import (
+    AccountsError,
+    ApeException,
+    ProviderError,
+    SignatureError,
+)
+from ape.logging import logger
+from ape.types import AddressType, HexBytes, LogFilter, MessageSignature
 from ape.utils import ZERO_ADDRESS, ManagerAccessMixin, cached_property
 from ape_ethereum import multicall
 from ape_ethereum.multicall.exceptions import UnsupportedChainError
+from eip712 import EIP712Domain
+from ethpm_types import ContractType
 from ethpm_types.abi import ABIType, MethodABI
-from eth_utils import to_int, to_bytes, keccak
+from eth_utils import to_checksum_address, to_hex, to_int, to_bytes, keccak
 from packaging.version import Version
+from pydantic import BaseModel, ConfigDict
 
-from .messages import ActionType, Execute
+from .messages import ActionType, BatchBuilder, Execute
+from .metadata import WALLET_METADATA
 from .modules import ModuleManager
-from .packages import PackageType, STABLE_VERSION
+from .packages import MANIFESTS, PackageType, STABLE_VERSION
+from .planner import plan_approvals
+from .rpc import batch_requests, get_logs
+from .signatures import recover_signer
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
-    from ape.api import AccountAPI, ReceiptAPI
+    from ape.api import AccountAPI, BlockAPI, ReceiptAPI
 
     from .factory import Factory
     from .messages.admin import Modify
     from .queue import QueueManager, QueueItem
 
 
+# NOTE: Just the view methods needed for `WalletState`, which are the same in every version
+WALLET_STATE_ABI = [
+    MethodABI(
+        name=name,
+        stateMutability="view",
+        outputs=[ABIType(type=output_type)],
+    )
+    for name, output_type in (
+        ("head", "bytes32"),
+        ("threshold", "uint256"),
+        ("signers", "address[]"),
+        ("admin_guard", "address"),
+        ("execute_guard", "address"),
+        ("VERSION", "string"),
+    )
+]
+
+
+class WalletState(BaseModel):
+    """Snapshot of a Wallet's on-chain configuration, as of block ``block_number``"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    block_number: int
+    block_hash: HexBytes
+    head: HexBytes
+    threshold: int
+    signers: list[AddressType]
+    admin_guard: AddressType
+    execute_guard: AddressType
+    version: Version
+
+
 # TODO: Subclass Ape's AccountAPI and make it a plugin
 class Caravan(ManagerAccessMixin):
+    # NOTE: Max number of calls to make in a single multicall (to avoid hitting RPC limits)
+    MAX_MULTICALL_SIZE: int = 500
+    # NOTE: How long (in seconds) to re-use `state` before fetching it again (about 1 block)
+    STATE_TTL: float = 12.0
+    # NOTE: Intrinsic gas cost of every transaction
+    TRANSACTION_BASE_GAS: int = 21_000
+    # NOTE: Approximate overhead of sending calls through Multicall3 instead of directly,
+    #       once per transaction (dispatch and decoding) and per call (`CALL` and encoding)
+    MULTICALL_BASE_GAS: int = 10_000
+    MULTICALL_CALL_GAS: int = 5_000
+
     def __init__(
         self,
         address: AddressType,
@@ -38,6 +96,8 @@ class Caravan(ManagerAccessMixin):
         queue: "QueueManager | None" = None,
     ):
         self.address = address
+        self._state: WalletState | None = None
+        self._state_fetched_at = 0.0
 
         if factory:
             # NOTE: Override cached value (useful for testing)
@@ -62,10 +122,57 @@ class Caravan(ManagerAccessMixin):
         # NOTE: This lets us more easily test
         from .queue import QueueManager
 
-        return QueueManager.load(base=self.head)
+        # NOTE: Only load messages for this wallet, including any newer versions it may migrate to
+        versions = {self.version, *(v for v in MANIFESTS if v > self.version)}
+        return QueueManager.load(
+            base=self.head,
+            domains=[self.get_eip712_domain(version) for version in versions],
+        )
+
+    def get_eip712_domain(self, version: Version | None = None) -> EIP712Domain:
+        return EIP712Domain(
+            name="Caravan Wallet",
+            verifyingContract=self.address,
+            version=str(version or self.version),
+            chainId=self.provider.chain_id,
+        )
+
+    @property
+    def _metadata(self) -> dict[str, Any]:
+        # NOTE: Ephemeral networks can re-use the same address for a different Wallet
+        if self.provider.network.is_dev:
+            return {}
+
+        return WALLET_METADATA.get(self.provider.chain_id, self.address)
+
+    def _update_metadata(self, **metadata: Any):
+        if not self.provider.network.is_dev:
+            WALLET_METADATA.update(self.provider.chain_id, self.address, **metadata)
+
+    def _invalidate_metadata(self, receipt: "ReceiptAPI"):
+        # NOTE: Every transaction we send modifies the Wallet (e.g. `head`)
+        self.invalidate_state()
+
+        if any(
+            log.event_name == "ImplementationUpgraded"
+            and log.contract_address == self.address
+            for log in receipt.events
+        ):
+            # NOTE: Everything else (e.g. storage) is kept by the proxy
+            WALLET_METADATA.invalidate(self.provider.chain_id, self.address, "version")
+
+        if (modules := self.__dict__.get("modules")) and any(
+            log.event_name == "ModuleUpdated" and log.contract_address == self.address
+            for log in receipt.events
+        ):
+            # NOTE: Don't wait for the index to expire to see our own changes
+            modules.update()
 
     @cached_property
     def version(self) -> Version:
+        if version := self._metadata.get("version"):
+            return Version(version)
+
         # NOTE: Do this raw so we can determine the proper version to use
         call = ContractCall(
             abi=MethodABI(
@@ -75,7 +182,18 @@ class Caravan(ManagerAccessMixin):
             ),
             address=self.address,
         )
-        return Version(call())
+        version = Version(call())
+        self._update_metadata(version=str(version))
+        return version
+
+    def _set_version(self, version: Version):
+        self._update_metadata(version=str(version))
+        self.version = version
+
+        # NOTE: Reset everything that was cached using the previous version (e.g. the ABI or the
+        #       EIP712 domains of the queue), so it is re-created using the new version
+        for name in ("contract", "queue"):
+            self.__dict__.pop(name, None)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.address} version={self.version})"
@@ -83,8 +201,12 @@ class Caravan(ManagerAccessMixin):
     @cached_property
     def contract(self) -> ContractInstance:
         proxy_code = PackageType.PROXY().contract_type.get_runtime_bytecode()
-        if self.provider.get_code(self.address) != proxy_code:
-            raise RuntimeError(f"{self.address} is not a CaravanProxy")
+        # NOTE: Proxy code can never change, so only need to verify it once
+        if self._metadata.get("code_hash") != (code_hash := keccak(proxy_code).hex()):
+            if self.provider.get_code(self.address) != proxy_code:
+                raise RuntimeError(f"{self.address} is not a CaravanProxy")
+
+            self._update_metadata(code_hash=code_hash)
 
         return PackageType.SINGLETON(self.version).at(
             self.address,
@@ -93,29 +215,191 @@ class Caravan(ManagerAccessMixin):
             # TODO: `proxy_info=self.contract.implementation()` using EIP-1967
         )
 
+    @cached_property
+    def deployment_block(self) -> int:
+        """The block the Wallet was created in (or ``0``, if it can't be looked up)."""
+
+        if (block := self._metadata.get("deployment_block")) is None:
+            block = self._find_deployment_block()
+            self._update_metadata(deployment_block=block)
+
+        return block
+
+    def _find_deployment_block(self) -> int:
+        height = self.chain_manager.blocks.height
+
+        # NOTE: Search for the block the proxy code first appears in, which only needs about
+        #       `log2(height)` requests (but requires an archive node)
+        low, high = 0, height
+        try:
+            while low < high:
+                if self.provider.get_code(
+                    self.address, block_id=(mid := (low + high) // 2)
+                ):
+                    high = mid
+
+                else:
+                    low = mid + 1
+
+            return low
+
+        except ApeException as err:
+            logger.debug(f"Could not search for code of {self.address}: {err}")
+
+        # NOTE: Otherwise, scan the factory's logs from when it was deployed (if known), and
+        #       since `new_proxy` is not indexed in `NewCaravan`, match it in the decoded logs
+        if creation := self.chain_manager.contracts.get_creation_metadata(
+            self.factory.address
+        ):
+            start_block = creation.block
+
+        else:
+            start_block = 0
+
+        log_filter = LogFilter.from_event(
+            self.factory.contract.NewCaravan, addresses=[self.factory.address]
+        )
+        try:
+            for _, logs in get_logs(self.provider, log_filter, start_block, height):
+                for log in logs:
+                    if log.new_proxy == self.address:
+                        return log.block_number
+
+        except ApeException as err:
+            logger.debug(f"Could not scan for 'NewCaravan' logs: {err}")
+
+        logger.warning(
+            f"Could not find deployment block of {self.address}, "
+            "scanning for events from genesis instead."
+        )
+        return 0
+
+    def get_state(self, block_id: int | None = None) -> WalletState:
+        """Fetch a snapshot of the Wallet's configuration at ``block_id`` (defaults to latest)."""
+
+        block = (
+            self.chain_manager.blocks.head
+            if block_id is None
+            else self.chain_manager.blocks[block_id]
+        )
+        return self._fetch_state(block)
+
+    @property
+    def state(self) -> WalletState:
+        """
+        Snapshot of the Wallet's configuration, re-used for up to ``STATE_TTL`` seconds (or until
+        refreshed, see ``refresh_state``).
+
+        NOTE: Always re-fetched on development networks, since storage can be modified (or the
+              chain rewound to a snapshot) at any time, w/o producing a new block.
+        """
+
+        if (
+            self._state is None
+            or self.provider.network.is_dev
+            or time.monotonic() - self._state_fetched_at > self.STATE_TTL
+        ):
+            return self.refresh_state()
+
+        return self._state
+
+    def refresh_state(self) -> WalletState:
+        """Fetch the latest snapshot of the Wallet's configuration (e.g. after it was modified)."""
+
+        self._state = state = self._fetch_state(self.chain_manager.blocks.head)
+        self._state_fetched_at = time.monotonic()
+
+        if (
+            known := self.__dict__.get("version")
+        ) is not None and known != state.version:
+            # NOTE: Implementation was upgraded (e.g. by someone else) since it was cached
+            self._set_version(state.version)
+
+        elif (cached := self._metadata.get("version")) and cached != str(state.version):
+            self._update_metadata(version=str(state.version))
+
+        return state
+
+    def invalidate_state(self):
+        """Drop the cached snapshot, so that ``state`` is re-fetched on next access."""
+
+        self._state = None
+
+    def _fetch_state(self, block: "BlockAPI") -> WalletState:
+        # NOTE: Do this raw so that it does not depend on the version (or `.contract`)
+        # NOTE: Not cached in `chain_manager.contracts`, so it does not replace the full ABI
+        interface = ContractInstance(self.address, ContractType(abi=WALLET_STATE_ABI))
+        methods = [getattr(interface, abi.name) for abi in WALLET_STATE_ABI]
+
+        call = multicall.Call()
+        for method in methods:
+            call.add(method)
+
+        # NOTE: Storage can be modified locally on dev networks w/o producing a new block,
+        #       which reading at a specific block number may not reflect
+        block_id = "latest" if self.provider.network.is_dev else block.number
+
+        try:
+            results = list(call(block_id=block_id))
+
+        except UnsupportedChainError:
+            # NOTE: Make the same calls in one batch of JSON-RPC requests instead
+            call_block = block_id if block_id == "latest" else hex(block_id)
+            requests = [
+                (
+                    "eth_call",
+                    [
+                        {"to": self.address, "data": method.encode_input().to_0x_hex()},
+                        call_block,
+                    ],
+                )
+                for method in methods
+            ]
+            decode = self.provider.network.ecosystem.decode_returndata
+            results = [
+                # NOTE: Every method has exactly one output
+                decode(abi, HexBytes(returndata))[0]
+                for abi, returndata in zip(
+                    WALLET_STATE_ABI, batch_requests(self.provider, requests)
+                )
+            ]
+
+        head, threshold, signers, admin_guard, execute_guard, version = results
+        return WalletState(
+            block_number=block.number,
+            block_hash=block.hash,
+            head=head,
+            threshold=threshold,
+            signers=signers,
+            admin_guard=admin_guard,
+            execute_guard=execute_guard,
+            version=Version(version),
+        )
+
     @property
     def threshold(self) -> int:
-        return self.contract.threshold()
+        return self.state.threshold
 
     @property
     def signers(self) -> list[AddressType]:
-        return self.contract.signers()
+        return self.state.signers
 
     @property
     def head(self) -> HexBytes:
-        return self.contract.head()
+        return self.state.head
 
     def set_head(self, new_head: HexBytes):
         # NOTE: allows modifying head for local simulation and testing
         # NOTE: Storage slot 1 in contract is head
         self.provider.set_storage(self.address, 1, new_head)
+        # NOTE: Storage was modified w/o producing a new block
+        self.invalidate_state()
 
-    @property
-    def local_signers(self) -> list["AccountAPI"]:
+    def get_local_signers(self, state: WalletState | None = None) -> list["AccountAPI"]:
         from ape.api.accounts import ImpersonatedAccount
 
         local_signers = []
-        for signer_address in self.signers:
+        for signer_address in (state or self.state).signers:
             try:
                 signer = self.account_manager[signer_address]
 
@@ -127,22 +411,57 @@ class Caravan(ManagerAccessMixin):
 
         return local_signers
 
-    def onchain_approvals(self, msghash: "HexBytes") -> list[AddressType]:
-        call = multicall.Call()
+    @property
+    def local_signers(self) -> list["AccountAPI"]:
+        return self.get_local_signers()
 
-        for signer in (signers := self.signers):
-            call.add(self.contract.approved, msghash, signer)
+    def onchain_approvals(
+        self, msghash: "HexBytes", state: WalletState | None = None
+    ) -> list[AddressType]:
+        return self.get_onchain_approvals([msghash], state=state)[msghash]
 
-        try:
-            approved = dict(zip(signers, call()))
-            get_approval = approved.__getitem__
+    def get_onchain_approvals(
+        self, msghashes: "Iterable[HexBytes]", state: WalletState | None = None
+    ) -> dict[HexBytes, list[AddressType]]:
+        """Get the signers who approved each of ``msghashes`` on-chain, in as few calls as possible."""
 
-        except UnsupportedChainError:
-            get_approval = partial(self.contract.approved, msghash)
+        signers = (state or self.state).signers
+        approvals: dict[HexBytes, list[AddressType]] = {
+            HexBytes(msghash): [] for msghash in msghashes
+        }
+        lookups = [(msghash, signer) for msghash in approvals for signer in signers]
 
-        return list(filter(get_approval, signers))
+        try:
+            approved = []
+            for start in range(0, len(lookups), self.MAX_MULTICALL_SIZE):
+                call = multicall.Call()
+                for msghash, signer in lookups[start : start + self.MAX_MULTICALL_SIZE]:
+                    call.add(self.contract.approved, msghash, signer)
 
-    def impersonate_signature(self, msghash: "HexBytes", signer: AddressType):
+                approved.extend(call())
+
+        except UnsupportedChainError:
+            # NOTE: Read `approved` directly from storage, in one batch of JSON-RPC requests
+            requests = [
+                (
+                    "eth_getStorageAt",
+                    [self.address, hex(self._approval_slot(*lookup)), "latest"],
+                )
+                for lookup in lookups
+            ]
+            approved = [
+                to_int(HexBytes(value))
+                for value in batch_requests(self.provider, requests)
+            ]
+
+        for (msghash, signer), is_approved in zip(lookups, approved):
+            if is_approved:
+                approvals[msghash].append(signer)
+
+        return approvals
+
+    @staticmethod
+    def _approval_slot(msghash: "HexBytes", signer: AddressType) -> int:
         # NOTE: `approved` is `msg.hash => address => bool` @ slot 2
         slot = b"\x00" * 31 + to_bytes(2)
 
@@ -150,19 +469,63 @@ class Caravan(ManagerAccessMixin):
 
         address_bytes32 = to_bytes(hexstr=signer)
         address_bytes32 = b"\x00" * (32 - len(address_bytes32)) + address_bytes32
-        slot = keccak(address_bytes32 + slot)
+        return to_int(keccak(address_bytes32 + slot))
 
-        self.provider.set_storage(self.address, to_int(slot), b"\x01")
+    def impersonate_signature(self, msghash: "HexBytes", signer: AddressType):
+        self.provider.set_storage(
+            self.address, self._approval_slot(msghash, signer), b"\x01"
+        )
         # TODO: Use native ape slot indexing, once available
         #       e.g. `self.contract.approved[msg.hash][signer] = bool`
 
+    def unlock_signers(
+        self, autosign: bool = False, state: WalletState | None = None
+    ) -> list["AccountAPI"]:
+        """
+        Unlock all local signers up front (prompting for each passphrase only once), so that
+        signing many messages does not need to decrypt each signer's key again every time.
+
+        If ``autosign`` is set, signers also stop asking to confirm each message they sign.
+        """
+
+        unlocked = []
+        for signer in self.get_local_signers(state=state):
+            if autosign and hasattr(signer, "set_autosign"):
+                signer.set_autosign(True)
+
+            elif hasattr(signer, "unlock"):
+                signer.unlock()
+
+            else:
+                continue  # NOTE: e.g. hardware wallets, which can't be unlocked
+
+            unlocked.append(signer)
+
+        return unlocked
+
     def get_signatures(
-        self, msg: "Modify | Execute", skip: set[AddressType] | None = None
+        self,
+        msg: "Modify | Execute",
+        skip: set[AddressType] | None = None,
+        state: WalletState | None = None,
+        max_workers: int = 1,
+        local_signers: "Iterable[AccountAPI] | None" = None,
     ) -> Iterator[tuple[AddressType, MessageSignature]]:
-        """Yield off-chain signatures first from queue confirmations then ask local signers"""
+        """
+        Yield off-chain signatures first from queue confirmations then ask local signers
+
+        If ``max_workers`` is more than 1, local signers are asked concurrently (yielding in the
+        order they finish). Once iteration stops, signers that were not asked yet are skipped, but
+        signers that are already signing (e.g. prompting) can't be interrupted, and their
+        signatures are discarded.
 
+        NOTE: Concurrent signing is meant for signers that do not prompt in the terminal (e.g.
+              hardware wallets, or signers unlocked with ``unlock_signers(autosign=True)``).
+        """
+
+        state = state or self.state
         if skip is None:
-            skip = set(self.onchain_approvals(msg.hash))
+            skip = set(self.get_onchain_approvals([msg.hash], state=state)[msg.hash])
 
         try:
             signatures = self.queue.find(msg.hash).signatures
@@ -172,25 +535,48 @@ class Caravan(ManagerAccessMixin):
             signatures = {}
 
         # First, yield all existing signatures in-queue (if any)
-        for sig in signatures:
-            if (address := recover_signer(msg, sig)) not in skip:
+        for sig in signatures.values():
+            if (address := recover_signer(msg.hash, sig)) not in skip:
                 yield address, sig
 
             skip.add(address)
 
         # Then, collect new signatures from local signers
-        for signer in set(self.local_signers) - skip:
-            if sig := signer.sign_message(msg):
-                yield signer.address, sig
+        if local_signers is None:
+            local_signers = self.get_local_signers(state=state)
+
+        local_signers = set(local_signers) - skip
+        if max_workers <= 1:
+            for signer in local_signers:
+                if sig := signer.sign_message(msg):
+                    yield signer.address, sig
 
-        # NOTE: If we made it here, we probably needed more signatures
+            # NOTE: If we made it here, we probably needed more signatures
+            return
 
-    def stage(self, msg: "Modify | Execute") -> "QueueItem":
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {
+                executor.submit(signer.sign_message, msg): signer
+                for signer in local_signers
+            }
+            for future in as_completed(pending):
+                if sig := future.result():
+                    yield pending[future].address, sig
+
+        finally:
+            # NOTE: Iteration stopped (e.g. threshold reached), don't wait on remaining signers
+            #       (only signers not started yet are cancelled, the rest run to completion)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stage(self, msg: "Modify | Execute", max_workers: int = 1) -> "QueueItem":
         """Stage message ``msg`` into queue, after collecting signatures from available local signers."""
-        signatures = dict(
+        state = self.state
+        with closing(
+            self.get_signatures(msg, state=state, max_workers=max_workers)
+        ) as all_signatures:
             # NOTE: `islice` only asks for up to N
-            itertools.islice(self.get_signatures(msg), self.threshold)
-        )
+            signatures = dict(itertools.islice(all_signatures, state.threshold))
 
         # NOTE: Otherwise we'd have an import cycle
         from .queue import QueueItem
@@ -204,18 +590,69 @@ class Caravan(ManagerAccessMixin):
 
         return item
 
+    def stage_many(
+        self,
+        msgs: "Iterable[Modify | Execute]",
+        chain: bool = False,
+        max_workers: int = 1,
+    ) -> list["QueueItem"]:
+        """
+        Stage all messages ``msgs`` into queue (in order), collecting signatures for all of them
+        from available local signers using a single read of the Wallet's state, and saving the
+        queue only once at the end.
+
+        If ``chain`` is set, each message is re-parented onto the previous one (the first keeps
+        its own parent), so they can be executed one after another (e.g. w/ ``merge``).
+        """
+        msgs = list(msgs)
+        if chain:
+            for parent, msg in zip(msgs, msgs[1:]):
+                # NOTE: Invalidates `msg.hash` (and so re-parents the rest of the chain too)
+                msg.parent = parent.hash
+
+        state = self.state
+        approvals = self.get_onchain_approvals([msg.hash for msg in msgs], state=state)
+        local_signers = self.get_local_signers(state=state)
+
+        # NOTE: Otherwise we'd have an import cycle
+        from .queue import QueueItem
+
+        items = []
+        for msg in msgs:
+            with closing(
+                self.get_signatures(
+                    msg,
+                    skip=set(approvals[msg.hash]),
+                    state=state,
+                    max_workers=max_workers,
+                    local_signers=local_signers,
+                )
+            ) as all_signatures:
+                # NOTE: `islice` only asks for up to N
+                signatures = dict(itertools.islice(all_signatures, state.threshold))
+
+            self.queue.add(item := QueueItem(message=msg, signatures=signatures))
+            items.append(item)
+
+        if not self.provider.network.is_dev:
+            # NOTE: Don't save permanent changes on ephemeral networks
+            self.queue.save()
+
+        return items
+
     def commit(self, msg: "Modify | Execute | HexBytes", **txn_args) -> "ReceiptAPI":
         """Submit message ``msg`` on-chain, collecting signatures if needed."""
 
         if isinstance(msg, HexBytes):
             msg = self.queue.find(msg).message
 
-        if msg.parent != self.head:
+        # NOTE: Use the same snapshot for all checks
+        if msg.parent != (state := self.state).head:
             raise RuntimeError("Cannot execute call, wrong head")
 
         # TODO: Support `impersonate=True`
         #       (set storage directly, so `len(approved) >= self.threshold`)
-        approved = self.onchain_approvals(msg.hash)
+        approved = self.onchain_approvals(msg.hash, state=state)
 
         try:
             signatures = self.queue.find(msg.hash).signatures
@@ -223,17 +660,23 @@ class Caravan(ManagerAccessMixin):
         except IndexError:
             raise RuntimeError(f"Message {msg} not in queue. Please stage first")
 
-        if (have := len(approved) + len(signatures)) < (threshold := self.threshold):
-            raise RuntimeError(f"Not enough signatures. Need {threshold - have} more.")
+        plan = plan_approvals(state.threshold, state.signers, approved, signatures)
+        if plan.missing:
+            raise RuntimeError(f"Not enough signatures. Need {plan.missing} more.")
+
+        elif plan.skipped:
+            logger.info(
+                f"Skipping {len(plan.skipped)} signature(s), saving ~{plan.gas_saved} gas"
+            )
 
         # NOTE: Skip `.parent`, contract implicitly uses `.head`
         fn_args = list(msg)[1:]
-        if signatures:
-            # TODO: Add logging?
-            fn_args.append([sig.encode_rsv() for sig in signatures.values()])
+        if plan.signatures:
+            fn_args.append([sig.encode_rsv() for sig in plan.signatures.values()])
 
         fn = getattr(self.contract, msg.__class__.__name__.lower())
         receipt = fn(*fn_args, **txn_args)
+        self._invalidate_metadata(receipt)
 
         if not self.provider.network.is_dev:
             # NOTE: Don't save permanent changes on ephemeral networks
@@ -242,31 +685,94 @@ class Caravan(ManagerAccessMixin):
 
         return receipt
 
-    def merge(self, new_head: HexBytes, **txn_args) -> "ReceiptAPI":
-        """Commit **all** messages in branch from ``self.head`` to ``new_head`` on-chain."""
-
-        txn = multicall.Transaction()
-        threshold = self.threshold
+    @staticmethod
+    def _rotate_signers(
+        signers: list[AddressType], threshold: int, msg: "Modify"
+    ) -> tuple[list[AddressType], int]:
+        """Same as ``_rotate_signers`` in the Wallet, for a ``ROTATE_SIGNERS`` message ``msg``."""
+
+        signers_to_add, signers_to_rm, new_threshold = msg.decode()
+        # NOTE: Decoded addresses are not checksummed
+        signers_to_rm = set(map(to_checksum_address, signers_to_rm))
+        signers = [signer for signer in signers if signer not in signers_to_rm]
+        signers.extend(map(to_checksum_address, signers_to_add))
+        return signers, new_threshold or threshold
+
+    def _get_merge_calls(
+        self, branch: "Iterable[QueueItem]", state: WalletState
+    ) -> list[tuple[Any, list]]:
+        """Get the method and args to call for each item in ``branch``, using the cheapest plan."""
+
+        branch = list(branch)
+        rotations = {
+            item.hash
+            for item in branch
+            if item.message_type == "Modify"
+            and item.message.action == ActionType.ROTATE_SIGNERS.value
+        }
+
+        # NOTE: Also look up approvals from signers added by the branch itself
+        signers, threshold = list(state.signers), state.threshold
+        all_signers = set(signers)
+        for item in branch:
+            if item.hash in rotations:
+                signers, threshold = self._rotate_signers(
+                    signers, threshold, item.message
+                )
+                all_signers.update(signers)
+
+        gas_saved = 0
+        all_approvals = self.get_onchain_approvals(
+            (item.hash for item in branch),
+            state=state.model_copy(update={"signers": sorted(all_signers)}),
+        )
 
-        for item in self.queue.get_branch(new_head):
+        # NOTE: Each item is executed w/ the signers (and threshold) left by the previous ones
+        signers, threshold = list(state.signers), state.threshold
+        calls = []
+        for item in branch:
             fn = getattr(self.contract, item.message_type.lower())
             # NOTE: Skip `.parent`, contract implicitly uses `.head`
             fn_args = list(item.message)[1:]
 
-            if len(approvals := self.onchain_approvals(item.hash)) >= threshold:
-                txn.add(fn, *fn_args)
+            plan = plan_approvals(
+                threshold,
+                signers,
+                all_approvals[item.hash],
+                item.signatures,
+            )
+            if plan.missing:
+                raise RuntimeError(f"Cannot merge {item}: not enough signatures")
 
-            elif len(set(approvals) | set(item.signatures)) >= threshold:
-                signatures = [sig.encode_rsv() for sig in item.signatures.values()]
-                txn.add(fn, *fn_args, signatures)
+            elif plan.signatures:
+                fn_args.append([sig.encode_rsv() for sig in plan.signatures.values()])
 
-            else:
-                raise RuntimeError(f"Cannot merge {item}: not enough signatures")
+            calls.append((fn, fn_args))
+            gas_saved += plan.gas_saved
+
+            if item.hash in rotations:
+                signers, threshold = self._rotate_signers(
+                    signers, threshold, item.message
+                )
 
-            # TODO: Look for modified `threshold` or `self.signers`
             # TODO: Look for version migration
 
+        if gas_saved:
+            logger.info(f"Skipping unneeded signatures, saving ~{gas_saved} gas")
+
+        return calls
+
+    def merge(self, new_head: HexBytes, **txn_args) -> "ReceiptAPI":
+        """Commit **all** messages in branch from ``self.head`` to ``new_head`` on-chain."""
+
+        txn = multicall.Transaction()
+        for fn, fn_args in self._get_merge_calls(
+            self.queue.get_branch(new_head), self.state
+        ):
+            txn.add(fn, *fn_args)
+
         receipt = txn(**txn_args)
+        self._invalidate_metadata(receipt)
 
         if not self.provider.network.is_dev:
             # NOTE: Don't save permanent changes on ephemeral networks
@@ -275,6 +781,134 @@ class Caravan(ManagerAccessMixin):
 
         return receipt
 
+    def _estimate_merge_gas(
+        self, calls: list[tuple[Any, list]], sender: Any
+    ) -> list[int]:
+        """
+        Estimate the gas used by each of the merge ``calls``, by executing them one after another
+        in a simulation (since each one depends on the previous ones).
+        """
+
+        gas_used = []
+        with (
+            self.chain_manager.isolate()
+            if self.provider.network.is_dev
+            else self.network_manager.fork()
+        ):
+            # NOTE: Impersonate `sender` so the simulation does not need to sign anything
+            sender = self.account_manager.test_accounts[
+                self.conversion_manager.convert(sender, AddressType)
+            ]
+            for fn, fn_args in calls:
+                receipt = fn(*fn_args, sender=sender)
+                # NOTE: Only one transaction (so one intrinsic cost) is needed per chunk
+                gas_used.append(receipt.gas_used - self.TRANSACTION_BASE_GAS)
+
+        return gas_used
+
+    def merge_chunked(
+        self,
+        new_head: HexBytes,
+        max_gas: int | None = None,
+        gas_margin: float = 1.2,
+        **txn_args,
+    ) -> list["ReceiptAPI"]:
+        """
+        Commit **all** messages in branch from ``self.head`` to ``new_head`` on-chain, split into
+        as many multicall transactions as needed to keep each one under ``max_gas`` (defaults to
+        the block gas limit). Gas is estimated per message (in a simulation), plus the overhead
+        of sending it through Multicall3, and scaled up by ``gas_margin`` for each chunk's gas
+        limit.
+
+        All transactions are signed by ``sender`` and sent back-to-back (w/ consecutive nonces)
+        without waiting for each one to be mined, and are then confirmed together at the end.
+        """
+
+        if not (sender := txn_args.pop("sender", None)):
+            raise RuntimeError("Must provide `sender=` to merge")
+
+        if max_gas is None:
+            max_gas = self.chain_manager.blocks.head.gas_limit
+
+        branch = self.queue.get_branch(new_head)
+        calls = self._get_merge_calls(branch, self.state)
+        gas_used = [
+            gas + self.MULTICALL_CALL_GAS
+            for gas in self._estimate_merge_gas(calls, sender)
+        ]
+
+        base_gas = self.TRANSACTION_BASE_GAS + self.MULTICALL_BASE_GAS
+        chunks: list[tuple[list[tuple[Any, list]], int]] = []
+        chunk: list[tuple[Any, list]] = []
+        chunk_gas = base_gas
+        for item, call, gas in zip(branch, calls, gas_used):
+            if chunk and int((chunk_gas + gas) * gas_margin) > max_gas:
+                chunks.append((chunk, int(chunk_gas * gas_margin)))
+                chunk, chunk_gas = [], base_gas
+
+            if int((base_gas + gas) * gas_margin) > max_gas:
+                logger.warning(f"{item} alone needs more than {max_gas} gas")
+
+            chunk.append(call)
+            chunk_gas += gas
+
+        if chunk:
+            chunks.append((chunk, int(chunk_gas * gas_margin)))
+
+        # NOTE: Set `nonce` since we don't wait for each transaction to be mined before sending
+        #       the next one, and set `gas_limit` so the provider doesn't estimate it (which
+        #       fails for every chunk but the first, since they depend on the previous ones)
+        nonce = sender.nonce
+        txn_hashes = []
+        try:
+            for chunk, gas_limit in chunks:
+                txn = multicall.Transaction()
+                for fn, fn_args in chunk:
+                    txn.add(fn, *fn_args)
+
+                prepped_txn = txn.as_transaction(
+                    sender=sender, nonce=nonce, gas_limit=gas_limit, **txn_args
+                )
+                if not (signed_txn := sender.sign_transaction(prepped_txn)):
+                    raise SignatureError(
+                        "The transaction was not signed.", transaction=prepped_txn
+                    )
+
+                try:
+                    txn_hashes.append(
+                        self.provider.make_request(
+                            "eth_sendRawTransaction",
+                            [to_hex(signed_txn.serialize_transaction())],
+                        )
+                    )
+
+                except ProviderError as err:
+                    raise self.provider.get_virtual_machine_error(
+                        err, txn=signed_txn
+                    ) from err
+
+                nonce += 1
+
+        finally:
+            # NOTE: Confirm all transactions at the end (also when a chunk fails to send, since
+            #       the previous ones were still sent)
+            receipts = [
+                self.provider.get_receipt(HexBytes(txn_hash).to_0x_hex())
+                for txn_hash in txn_hashes
+            ]
+            for receipt in receipts:
+                self._invalidate_metadata(receipt)
+
+            if receipts and not self.provider.network.is_dev:
+                # NOTE: Don't save permanent changes on ephemeral networks
+                self.queue.rebase(self.head)
+                self.queue.save()
+
+        for receipt in receipts:
+            receipt.raise_for_status()
+
+        return receipts
+
     #### Admin methods (uses `Modify` message type) ####
 
     def migrate(
@@ -353,13 +987,13 @@ class Caravan(ManagerAccessMixin):
     ) -> "QueueItem":
         return self.rotate_signers(threshold=threshold, parent=parent)
 
-    @property
+    @cached_property
     def modules(self) -> ModuleManager:
         return ModuleManager(self)
 
     @property
     def admin_guard(self) -> ContractInstance | None:
-        if (admin_guard := self.contract.admin_guard()) != ZERO_ADDRESS:
+        if (admin_guard := self.state.admin_guard) != ZERO_ADDRESS:
             return self.chain_manager.contracts.instance_at(admin_guard)
 
         return None
@@ -384,7 +1018,7 @@ class Caravan(ManagerAccessMixin):
 
     @property
     def execute_guard(self) -> ContractInstance | None:
-        if (execute_guard := self.contract.execute_guard()) != ZERO_ADDRESS:
+        if (execute_guard := self.state.execute_guard) != ZERO_ADDRESS:
             return self.chain_manager.contracts.instance_at(execute_guard)
 
         return None
@@ -411,3 +1045,6 @@ class Caravan(ManagerAccessMixin):
 
     def new_batch(self, parent: HexBytes | None = None) -> Execute:
         return Execute.new(van=self, parent=parent)
+
+    def new_batches(self, parent: HexBytes | None = None) -> BatchBuilder:
+        return BatchBuilder(van=self, parent=parent)
@@ -1,7 +1,8 @@
 from .admin import ActionType
-from .execute import Execute
+from .execute import BatchBuilder, Execute
 
 __all__ = [
     ActionType.__name__,
+    BatchBuilder.__name__,
     Execute.__name__,
 ]
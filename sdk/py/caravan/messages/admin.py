@@ -1,10 +1,12 @@
 from enum import Flag
 from typing import TYPE_CHECKING
 
-from eip712 import EIP712Message, EIP712Domain, hash_message
+from eip712 import EIP712Domain
 from eth_abi import encode as abi_encode, decode as abi_decode
 from eth_pydantic_types import abi, HexBytes
-from eth_pydantic_types.hex.bytes import HexBytes32
+
+from .base import CaravanMessage
+from .encoding import hash_modify
 
 if TYPE_CHECKING:
     from ape.types.address import AddressType
@@ -13,26 +15,23 @@ if TYPE_CHECKING:
     from .main import Caravan
 
 
-class Modify(EIP712Message):
+class Modify(CaravanMessage):
     parent: abi.bytes32  # type: ignore[name-defined]  # noqa: F821
     action: abi.uint256  # type: ignore[name-defined]  # noqa: F821
     data: HexBytes
 
-    @property
-    def hash(self) -> HexBytes32:
-        return hash_message(self)
+    def _struct_hash(self) -> bytes:
+        return hash_modify(self.parent, self.action, self.data)
+
+    def decode(self) -> tuple:
+        """Decode the arguments of the action (see ``TYPES``)."""
+
+        return abi_decode(tuple(TYPES[ActionType(self.action)].values()), self.data)
 
     def render(self) -> dict:
         t = ActionType(self.action)
         data = {"Action": t.name.replace("_", " ").capitalize()}
-        data.update(
-            dict(
-                zip(
-                    TYPES[t].keys(),
-                    abi_decode(tuple(TYPES[t].values()), self.data),
-                )
-            )
-        )
+        data.update(dict(zip(TYPES[t].keys(), self.decode())))
         return data
 
 
@@ -0,0 +1,54 @@
+from abc import abstractmethod
+from typing import Any
+
+from eip712 import EIP712Message
+from eth_account.messages import SignableMessage
+from eth_pydantic_types import HexBytes32
+from pydantic import PrivateAttr
+
+from .encoding import hash_typed_data
+
+
+class CaravanMessage(EIP712Message):
+    """Base class for Caravan's EIP712 messages, which memoizes their hash"""
+
+    # NOTE: Cleared whenever a field is modified (see `_invalidate_hash`)
+    _signable_message: SignableMessage | None = PrivateAttr(default=None)
+    _hash: HexBytes32 | None = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+
+        if name in self.__class__.model_fields:
+            self._invalidate_hash()
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CaravanMessage):
+            return NotImplemented
+
+        # NOTE: The hash commits to the domain and all fields, but not to memoized values
+        return type(self) is type(other) and self.hash == other.hash
+
+    @abstractmethod
+    def _struct_hash(self) -> bytes:
+        """The EIP712 struct hash of the message, as encoded by the Wallet"""
+
+    def _invalidate_hash(self):
+        # NOTE: Must be called after modifying a field in-place (e.g. `.calls.append`)
+        self._signable_message = None
+        self._hash = None
+
+    @property
+    def signable_message(self) -> SignableMessage:
+        if self._signable_message is None:
+            self._signable_message = super().signable_message
+
+        return self._signable_message
+
+    @property
+    def hash(self) -> HexBytes32:
+        if self._hash is None:
+            # NOTE: Much faster than `eip712.hash_message`, which encodes w/ reflection
+            self._hash = hash_typed_data(self._eip712_domain_, self._struct_hash())
+
+        return self._hash
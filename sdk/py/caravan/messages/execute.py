@@ -4,10 +4,14 @@ from typing import TYPE_CHECKING, ClassVar, Self
 
 from ape.api.accounts import ImpersonatedAccount
 from ape.utils import ManagerAccessMixin
-from eip712 import EIP712Domain, EIP712Message, hash_message
-from eth_pydantic_types import HexBytes, HexBytes32, abi
+from eip712 import EIP712Domain
+from eth_pydantic_types import HexBytes, abi
 from pydantic import BaseModel, PrivateAttr
 
+from ..simulation import SimulationSession
+from .base import CaravanMessage
+from .encoding import hash_execute
+
 if TYPE_CHECKING:
     from ape.api import ReceiptAPI
     from ape.api.address import BaseAddress
@@ -28,7 +32,7 @@ class Call(BaseModel):
         return f"{self.target}({self.data}, value={self.value}, required={self.success_required})"
 
 
-class Execute(EIP712Message, ManagerAccessMixin):
+class Execute(CaravanMessage, ManagerAccessMixin):
     MAX_CALLS: ClassVar[int] = 8
     MAX_CALLDATA_SIZE: ClassVar[int] = 16_388
 
@@ -37,9 +41,8 @@ class Execute(EIP712Message, ManagerAccessMixin):
 
     _van: "Caravan | None" = PrivateAttr(default=None)
 
-    @property
-    def hash(self) -> HexBytes32:
-        return hash_message(self)
+    def _struct_hash(self) -> bytes:
+        return hash_execute(self.parent, self.calls)
 
     def render(self) -> dict:
         if self.calls:
@@ -102,6 +105,8 @@ class Execute(EIP712Message, ManagerAccessMixin):
                 data=data,
             )
         )
+        # NOTE: `.calls` was modified in-place
+        self._invalidate_hash()
         return self
 
     def add(self, call, *args, value: int = 0, success_required: bool = True) -> Self:
@@ -137,21 +142,23 @@ class Execute(EIP712Message, ManagerAccessMixin):
         )
 
     @contextmanager
-    def add_from_simulation(self) -> Generator[ImpersonatedAccount, None, None]:
+    def add_from_simulation(
+        self, session: "SimulationSession | None" = None
+    ) -> Generator[ImpersonatedAccount, None, None]:
         if not self._van:
             raise RuntimeError("Only use simulations with an 'attached' batch instance")
 
-        with (
-            self.chain_manager.isolate()
-            if self.provider.network.is_dev
-            else self.network_manager.fork()
-        ):
-            with self.account_manager.use_sender(self._van.address) as van_account:
-                starting_nonce = van_account.nonce
+        if session is not None:
+            # NOTE: Re-use the session's simulated chain (w/ all previous batches applied)
+            with session.simulate(self) as van_account:
                 yield van_account
 
-            for txn in van_account.history[starting_nonce:]:
-                self.add_from_receipt(txn)
+        else:
+            with (
+                SimulationSession(self._van) as session,
+                session.simulate(self) as van_account,
+            ):
+                yield van_account
 
     def stage(self, van: "Caravan | None" = None) -> "QueueItem":
         if not (van or (van := self._van)):
@@ -164,3 +171,109 @@ class Execute(EIP712Message, ManagerAccessMixin):
             raise RuntimeError("Must provider `van=` to execute")
 
         return van.commit(self, **txn_args)
+
+
+class BatchBuilder(ManagerAccessMixin):
+    """
+    Build a chain of ``Execute`` messages from any number of calls (in order), starting a new
+    message (parented on the previous one) whenever the current one has ``Execute.MAX_CALLS``.
+
+    The whole chain can then be staged (see ``stage``), and merged on-chain in one transaction
+    (see ``__call__``, which also stages any messages not yet in the queue).
+    """
+
+    def __init__(
+        self,
+        van: "Caravan | None" = None,
+        parent: abi.bytes32 | None = None,
+        version: "Version | None" = None,
+        address: "AddressType | None" = None,
+        chain_id: int | None = None,
+    ):
+        self._van = van
+        self.messages: list[Execute] = [
+            Execute.new(
+                van=van,
+                parent=parent,
+                version=version,
+                address=address,
+                chain_id=chain_id,
+            )
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(batch.calls) for batch in self.messages)
+
+    @property
+    def head(self) -> HexBytes:
+        """The hash of the last message in the chain."""
+
+        return self.messages[-1].hash
+
+    def add_raw(
+        self,
+        target: "BaseAddress | AddressType | str",
+        value: str | int = 0,
+        success_required: bool = True,
+        data: HexBytes = b"",
+    ) -> Self:
+        if len((batch := self.messages[-1]).calls) < batch.MAX_CALLS:
+            batch.add_raw(target, value, success_required, data)
+
+        else:
+            new_batch = Execute(parent=batch.hash, eip712_domain=batch._eip712_domain_)
+            new_batch._van = self._van
+            # NOTE: Add before appending, so a call that can't fit in any message raises
+            #       without leaving an empty message at the end of the chain
+            new_batch.add_raw(target, value, success_required, data)
+            self.messages.append(new_batch)
+
+        return self
+
+    def add(self, call, *args, value: int = 0, success_required: bool = True) -> Self:
+        return self.add_raw(
+            target=call.contract,
+            value=value,
+            success_required=success_required,
+            data=call.encode_input(*args),
+        )
+
+    def add_transfer(
+        self,
+        target: "BaseAddress | AddressType | str",
+        value: int | str,
+        data: bytes = b"",
+        success_required: bool = True,
+    ) -> Self:
+        return self.add_raw(
+            target=target,
+            value=value,
+            success_required=success_required,
+            data=data,
+        )
+
+    def add_from_receipt(
+        self, receipt: "ReceiptAPI", success_required: bool = True
+    ) -> Self:
+        return self.add_raw(
+            target=receipt.receiver,
+            value=receipt.value,
+            success_required=success_required,
+            data=receipt.data,
+        )
+
+    def stage(self, van: "Caravan | None" = None) -> list["QueueItem"]:
+        if not (van or (van := self._van)):
+            raise RuntimeError("Must provider `van=` to execute")
+
+        return van.stage_many(self.messages, chain=True)
+
+    def __call__(self, van: "Caravan | None" = None, **txn_args) -> "ReceiptAPI":
+        if not (van or (van := self._van)):
+            raise RuntimeError("Must provider `van=` to execute")
+
+        if unstaged := [msg for msg in self.messages if msg not in van.queue]:
+            # NOTE: Already chained, so don't re-parent them
+            van.stage_many(unstaged)
+
+        return van.merge(self.head, **txn_args)
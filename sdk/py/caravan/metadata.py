@@ -0,0 +1,56 @@
+from typing import Any
+
+from ape.types import AddressType
+
+from .cache import PersistedCache
+from .settings import USER_CACHE_DIR
+
+
+class WalletMetadataCache(PersistedCache):
+    """
+    Cache of Wallet metadata that rarely changes (e.g. the verified proxy code hash, or the
+    implementation version), by ``(chain_id, address)``.
+
+    Entries should be invalidated when the Wallet's implementation is upgraded (see
+    ``invalidate``).
+    """
+
+    DEFAULT_PATH = USER_CACHE_DIR / ".wallets.json"
+
+    def __init__(self):
+        super().__init__()
+
+        self._cache: dict[str, dict[str, Any]] = {}
+
+    def _dump(self) -> dict[str, dict[str, Any]]:
+        # NOTE: Entries are modified in-place, so copy them while still holding the lock
+        return {key: dict(metadata) for key, metadata in self._cache.items()}
+
+    def get(self, chain_id: int, address: AddressType) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._cache.get(f"{chain_id}:{address}", {}))
+
+    def update(self, chain_id: int, address: AddressType, **metadata: Any):
+        with self._lock:
+            self._cache.setdefault(f"{chain_id}:{address}", {}).update(metadata)
+            self._modified = True
+
+    def invalidate(self, chain_id: int, address: AddressType, *keys: str):
+        """Drop ``keys`` from the Wallet's metadata (or all of it, if no ``keys`` are given)."""
+
+        with self._lock:
+            if (metadata := self._cache.get(key := f"{chain_id}:{address}")) is None:
+                return
+
+            elif not keys:
+                del self._cache[key]
+
+            else:
+                for name in keys:
+                    metadata.pop(name, None)
+
+            self._modified = True
+
+
+# NOTE: Process-wide cache, shared by all `Caravan` instances
+WALLET_METADATA = WalletMetadataCache()
@@ -1,10 +1,12 @@
+import time
 from typing import TYPE_CHECKING, Any
 
-from ape.types import AddressType
+from ape.types import AddressType, LogFilter
 from ape.utils import ManagerAccessMixin
 from eth_pydantic_types.hex.bytes import HexBytes
 
 from .messages import ActionType
+from .rpc import get_logs
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -15,34 +17,85 @@ if TYPE_CHECKING:
 
 
 class ModuleManager(ManagerAccessMixin):
+    # NOTE: Logs in the most recent blocks are re-scanned on every update, in case of a reorg
+    REORG_DEPTH: int = 12
+    # NOTE: How long (in seconds) the index is re-used before scanning for new logs again
+    UPDATE_TTL: float = 12.0
+
     def __init__(self, van: "Caravan"):
         self.van = van
 
-        self._cached_modules: set["ContractInstance"] = set()
-        self._last_cached: int = 0
+        # NOTE: Index of enabled modules, persisted up to `_last_confirmed` (see `update`)
+        index = van._metadata.get("modules", {})
+        self._confirmed_modules: set[AddressType] = set(index.get("enabled", []))
+        self._last_confirmed: int | None = index.get("last_block")
+
+        self._cached_modules: set[AddressType] = set(self._confirmed_modules)
+        self._last_cached: int = -1
+        self._updated_at: float | None = None
 
-    def _update_cache(self):
-        for log in self.van.contract.ModuleUpdated.range(
-            self._last_cached,
-            last_block := self.chain_manager.blocks.head.number,
+    def _get_modules(self) -> set[AddressType]:
+        if (
+            self._updated_at is None
+            or time.monotonic() - self._updated_at > self.UPDATE_TTL
         ):
-            if log.enabled:
-                self._cached_modules.add(
-                    self.chain_manager.contracts.instance_at(log.module)
-                )
+            self.update()
+
+        return self._cached_modules
+
+    def update(self):
+        """Scan for modules enabled or disabled since the last update."""
 
-            else:
-                self._cached_modules.remove(log.module)
+        self._updated_at = time.monotonic()
+        if (height := self.chain_manager.blocks.height) <= self._last_cached:
+            return  # NOTE: Already up to date
 
-            self._last_cached = last_block
+        start_block = (
+            self.van.deployment_block
+            if self._last_confirmed is None
+            else self._last_confirmed + 1
+        )
+        confirmed_block = height - self.REORG_DEPTH
+
+        modules = set(self._confirmed_modules)
+        log_filter = LogFilter.from_event(
+            self.van.contract.ModuleUpdated, addresses=[self.van.address]
+        )
+        for _, logs in get_logs(self.provider, log_filter, start_block, height):
+            for log in logs:
+                indexes = [modules]
+                if log.block_number <= confirmed_block:
+                    indexes.append(self._confirmed_modules)
+
+                for index in indexes:
+                    if log.enabled:
+                        index.add(log.module)
+
+                    else:
+                        index.discard(log.module)
+
+        self._cached_modules = modules
+        self._last_cached = height
+
+        if confirmed_block >= start_block:
+            self._last_confirmed = confirmed_block
+            self.van._update_metadata(
+                modules={
+                    "enabled": sorted(self._confirmed_modules),
+                    "last_block": confirmed_block,
+                }
+            )
 
     def __iter__(self) -> "Iterator[ContractInstance]":
-        self._update_cache()
-        return iter(self._cached_modules)
+        return iter(
+            self.chain_manager.contracts.instance_at(module)
+            for module in self._get_modules()
+        )
 
     def __contains__(self, address: Any) -> bool:
-        return address in self._cached_modules or self.van.contract.module_enabled(
-            address
+        # NOTE: Answered from the index, w/o calling `module_enabled`
+        return (
+            self.conversion_manager.convert(address, AddressType) in self._get_modules()
         )
 
     def enable(self, module: Any, parent: HexBytes | None = None):
@@ -0,0 +1,82 @@
+from typing import TYPE_CHECKING
+
+from ape.types import AddressType, MessageSignature
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# NOTE: Approximate gas costs of each signature sent to `_verify_signatures`
+ECRECOVER_GAS = 3_000  # `ecrecover` precompile
+VERIFY_OVERHEAD_GAS = 800  # slicing, membership checks and bookkeeping in the loop
+ENCODING_OVERHEAD_GAS = 4 * 96  # offset, length and padding words (mostly zero bytes)
+
+
+def signature_gas(signature: MessageSignature) -> int:
+    """Approximate gas cost of including ``signature`` in a call (calldata and verification)."""
+
+    calldata_gas = sum(16 if byte else 4 for byte in signature.encode_rsv())
+    return calldata_gas + ENCODING_OVERHEAD_GAS + ECRECOVER_GAS + VERIFY_OVERHEAD_GAS
+
+
+class ApprovalPlan(BaseModel):
+    """The cheapest set of approvals that executes a message (see ``plan_approvals``)"""
+
+    threshold: int
+    # NOTE: On-chain approvals are always counted by the contract, so are always used first
+    approvals: list[AddressType]
+    # NOTE: Signatures to send along w/ the call
+    signatures: dict[AddressType, MessageSignature]
+    # NOTE: Signatures that are not needed (or would make the call revert)
+    skipped: dict[AddressType, MessageSignature]
+
+    @property
+    def missing(self) -> int:
+        """Number of approvals still needed to execute."""
+
+        return max(self.threshold - len(self.approvals) - len(self.signatures), 0)
+
+    @property
+    def gas_saved(self) -> int:
+        """Approximate gas saved by not sending the skipped signatures."""
+
+        return sum(signature_gas(sig) for sig in self.skipped.values())
+
+
+def plan_approvals(
+    threshold: int,
+    signers: "Iterable[AddressType]",
+    approvals: "Iterable[AddressType]",
+    signatures: dict[AddressType, MessageSignature],
+) -> ApprovalPlan:
+    """
+    Pick the cheapest valid set of ``signatures`` to execute a message, given the current
+    ``threshold`` and ``signers`` of the Wallet, and the ``approvals`` it already has on-chain.
+
+    Pre-approvals are used first. Then, only enough signatures from the remaining signers to
+    reach ``threshold`` are sent (cheapest first). Signatures from signers that already
+    pre-approved are always skipped, since the contract reverts if a signer approves twice.
+    """
+
+    signers = set(signers)
+    approvals = [signer for signer in approvals if signer in signers]
+    needed = max(threshold - len(approvals), 0)
+
+    candidates = sorted(
+        (
+            (signer, sig)
+            for signer, sig in signatures.items()
+            if signer in signers and signer not in approvals
+        ),
+        key=lambda candidate: signature_gas(candidate[1]),
+    )
+    selected = dict(candidates[:needed])
+
+    return ApprovalPlan(
+        threshold=threshold,
+        approvals=approvals,
+        signatures=selected,
+        skipped={
+            signer: sig for signer, sig in signatures.items() if signer not in selected
+        },
+    )
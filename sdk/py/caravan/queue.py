@@ -1,20 +1,25 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Annotated, Self
+from typing import TYPE_CHECKING, Annotated, ClassVar, Self
 
 from ape.types import AddressType, HexBytes, MessageSignature
-from ape.types.signatures import recover_signer
 from ape.utils import to_int
 from eip712 import EIP712Domain
-from eth_account import Account
 from eth_account._utils.encode_typed_data.encoding_and_hashing import (
     hash_domain as web3_hash_domain,
 )
-from pydantic import BaseModel, PlainSerializer, model_validator
+from pydantic import BaseModel, PlainSerializer, PrivateAttr, model_validator
 
 from .messages.admin import Modify
 from .messages.execute import Execute
-from .settings import USER_CACHE_DIR
+from .settings import USER_QUEUE_PATH
+from .signatures import SIGNATURE_CACHE, recover_signer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .storage import QueueStorage
 
 
 def signature_serialize(s: MessageSignature) -> str:
@@ -33,7 +38,28 @@ class QueueItem(BaseModel):
 
     @classmethod
     def load(cls, path: Path, eip712_domain: EIP712Domain) -> Self:
-        message = json.loads((path / "message.json").read_text())
+        return cls.parse(
+            HexBytes(path.name),
+            json.loads((path / "message.json").read_text()),
+            {
+                AddressType(f.name): f.read_bytes()
+                for f in (path / "signatures").iterdir()
+            },
+            eip712_domain=eip712_domain,
+            location=path,
+        )
+
+    @classmethod
+    def parse(
+        cls,
+        itemhash: HexBytes,
+        message: dict,
+        raw_signatures: dict[AddressType, bytes],
+        eip712_domain: EIP712Domain,
+        location: Path | str,
+    ) -> Self:
+        """Parse (and verify) item ``itemhash`` from its raw, stored representation"""
+
         if "action" in message:
             message = Modify(**message, eip712_domain=eip712_domain)
         elif "calls" in message:
@@ -41,19 +67,19 @@ class QueueItem(BaseModel):
         else:
             raise ValueError
 
-        if message.hash.hex() != path.name:
-            raise RuntimeError(f"Corrupted message at {path}")
+        if message.hash != itemhash:
+            raise RuntimeError(f"Corrupted message at {location}")
 
         signatures = {
-            AddressType(f.name): MessageSignature(r=raw[:32], s=raw[32:64], v=raw[-1])
-            for f in (path / "signatures").iterdir()
-            if len((raw := f.read_bytes())) == 65
+            signer: MessageSignature(r=raw[:32], s=raw[32:64], v=raw[-1])
+            for signer, raw in raw_signatures.items()
+            if len(raw) == 65
         }
         if any(
-            recover_signer(message.signable_message, sig) != signer
+            recover_signer(message.hash, sig) != signer
             for signer, sig in signatures.items()
         ):
-            raise RuntimeError(f"Corrupted signature(s) at {path}")
+            raise RuntimeError(f"Corrupted signature(s) at {location}")
 
         return cls(message=message, signatures=signatures)
 
@@ -66,12 +92,7 @@ class QueueItem(BaseModel):
     @model_validator(mode="after")
     def validate_duplicate_signers(self) -> Self:
         for signer, signature in self.signatures.items():
-            if (
-                Account.recover_message(
-                    self.message.signable_message, vrs=tuple(signature)
-                )
-                != signer
-            ):
+            if recover_signer(self.message.hash, signature) != signer:
                 raise AssertionError("Invalid signer")
 
         return self
@@ -102,97 +123,211 @@ class QueueItem(BaseModel):
         return self.hash.to_0x_hex()
 
 
+def _load_items(
+    storage: "QueueStorage",
+    items: list[tuple[HexBytes, HexBytes, EIP712Domain]],
+    workers: int = 1,
+) -> list[QueueItem]:
+    if workers <= 1 or len(items) <= 1:
+        return [storage.load_item(*item) for item in items]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # NOTE: `.map` preserves order, and re-raises the first error (same as serial)
+        queue_items = list(
+            executor.map(
+                storage.load_item,
+                *zip(*items),
+                chunksize=max(1, len(items) // (4 * workers)),
+            )
+        )
+
+    # NOTE: Signatures were verified in the workers, so share results w/ this process
+    for item in queue_items:
+        for signer, signature in item.signatures.items():
+            SIGNATURE_CACHE.add(item.hash, signature, signer)
+
+    return queue_items
+
+
 class QueueManager(BaseModel):
     """Specialized Manager for indexing Caravan's off-chain message queue & signatures"""
 
+    MAX_CACHED_BRANCHES: ClassVar[int] = 16
+
     # QueueItem => list[QueueItem.hash]
     queue: dict[QueueItem, list[HexBytes]] = dict()
     base: HexBytes  # NOTE: Must always provide head!
 
+    # NOTE: Indexes kept in sync with `queue`, so that lookups are O(1)
+    # QueueItem.hash => QueueItem
+    _items: dict[HexBytes, QueueItem] = PrivateAttr(default_factory=dict)
+    # QueueItem.parent => list[QueueItem.hash] (also contains `base`)
+    _children: dict[HexBytes, list[HexBytes]] = PrivateAttr(default_factory=dict)
+    # QueueItem.hash => (domainSeparator, domain, parent), for items not parsed yet (see `load`)
+    _unloaded: dict[HexBytes, tuple[HexBytes, EIP712Domain, HexBytes]] = PrivateAttr(
+        default_factory=dict
+    )
+    # NOTE: Where the queue was loaded from (and is saved to by default)
+    _storage: "QueueStorage | None" = PrivateAttr(default=None)
+    # head => `.get_branch(head)` (cleared on rebase)
+    _branches: dict[HexBytes, tuple[QueueItem, ...]] = PrivateAttr(default_factory=dict)
+    # QueueItem.hash => signers added (or `None` if whole item is new), since last load/save
+    _modified: dict[HexBytes, set[AddressType] | None] = PrivateAttr(
+        default_factory=dict
+    )
+
     @model_validator(mode="after")
     def ensure_base(self) -> Self:
+        self._reindex()
         self.rebase(self.base)
         return self
 
+    def _reindex(self):
+        self._items = {item.hash: item for item in self.queue}
+        self._children = {itemhash: [] for itemhash in self._items}
+
+        for item in self.queue:
+            self._children.setdefault(item.parent, []).append(item.hash)
+
+        for item in self.queue:
+            # NOTE: Share the same list so `queue` stays consistent w/ `_children`
+            self.queue[item] = self._children[item.hash]
+
+        # NOTE: Items given on init have never been saved
+        self._modified = {itemhash: None for itemhash in self._items}
+
     @classmethod
-    def load(cls, base: HexBytes, path: Path | str = USER_CACHE_DIR) -> Self:
+    def load(
+        cls,
+        base: HexBytes,
+        path: Path | str = USER_QUEUE_PATH,
+        domains: "Iterable[EIP712Domain] | None" = None,
+        workers: int = 1,
+    ) -> Self:
         """
-        Load queue from dir-like path ``path``, with base ``base``.
-
-        NOTE: **Must** follow the following structure, either as a directory or zip file
-        ```
-        <msg.eip712_domain.hash>/
-            domain.json => msg.eip712_domain.model_dump_json()
-            <msg.hash>.json => msg.model_dump_json()
-        ...  # For other domains (supports multiple wallets and versions)
-        ```
+        Load queue from ``path``, with base ``base``.
+
+        If ``domains`` is provided, only the messages in those domains are read, and each item's
+        message and signatures are parsed (and verified) only when first accessed.
+
+        If ``workers`` is more than 1, items are parsed (and verified) up front using a pool
+        of that many processes.
+
+        NOTE: ``path`` can be a directory (see ``DirectoryStorage`` for the structure),
+              a zip archive (see ``ZipStorage``) or a SQLite database (see ``SQLiteStorage``).
+              A missing archive or database is loaded as an empty queue.
         """
+        # NOTE: Otherwise we'd have an import cycle
+        from .storage import DirectoryStorage, QueueStorage
+
+        storage = QueueStorage.from_path(path)
+        if not storage.exists() and isinstance(storage, DirectoryStorage):
+            raise RuntimeError(f"Path '{path}' does not exist, cannot load queue.")
 
         # NOTE: Meant to pass `base` as the latest on-chain head
-        if isinstance(path, str):
-            path = Path(path)
+        self = cls(base=base)
+        self._storage = storage
 
-        if not path.exists():
-            raise RuntimeError(f"Path '{path}' does not exist, cannot load queue.")
+        if not storage.exists():
+            # NOTE: A new database or archive is created on first save
+            return self
 
-        elif not path.is_dir():
-            raise RuntimeError(f"Path '{path}' must be a directory, cannot load queue.")
-
-        queue_items = []
-        # First, parse all folders in directory/archive
-        for domain_folder in path.iterdir():
-            # NOTE: Each message is located at `<root> / <domainSeparator> / <messageHash>`
-            #       This allows us to have messages indexed by `<domainSeparator>`, which
-            #       supports indexing version upgrades, as well as more than one wallet at time
-            if not domain_folder.is_dir():
-                raise RuntimeError(
-                    f"Corrupted queue: '{domain_folder.name}' is not a folder."
-                )
-
-            elif not (domain_file := domain_folder / "domain.json").exists():
-                raise RuntimeError(
-                    f"Corrupted queue: '{domain_folder.name}' does not contain domain file."
-                )
-
-            eip712_domain = EIP712Domain.model_validate_json(domain_file.read_text())
-
-            for file in domain_folder.iterdir():
-                if file.is_dir():
-                    queue_items.append(
-                        QueueItem.load(file, eip712_domain=eip712_domain)
-                    )
-
-        # Then re-create linked-list structure
-        queue = {
-            item: list(i.hash for i in queue_items if i.parent == item.hash)
-            for item in queue_items
-        }
+        if domains is None:
+            # NOTE: Supports multiple wallets and versions
+            domain_separators = list(storage.domains())
+
+        else:
+            domain_separators = [
+                (hash_domain(d.model_dump(exclude_none=True)), d) for d in domains
+            ]
 
-        # Finally, rebase onto the specific base that we care about (dropping rest)
-        return cls(queue=queue, base=base)
+        for domain_separator, eip712_domain in domain_separators:
+            for itemhash, parent in storage.index(domain_separator):
+                # NOTE: Only need `.parent` to index item, defer the rest until first access
+                self._unloaded[itemhash] = (domain_separator, eip712_domain, parent)
+                self._children.setdefault(itemhash, [])
+                self._children.setdefault(parent, []).append(itemhash)
+
+        if domains is None or workers > 1:
+            self.preload(workers=workers)
+
+        return self
 
-    def save(self, path: Path | str = USER_CACHE_DIR):
-        if isinstance(path, str):
-            return self.save(Path(path))
+    def _load_item(
+        self, itemhash: HexBytes, item: QueueItem | None = None
+    ) -> QueueItem:
+        domain_separator, eip712_domain, _ = self._unloaded.pop(itemhash)
+        if item is None:
+            assert self._storage  # NOTE: Can only have unloaded items if loaded
+            item = self._storage.load_item(domain_separator, itemhash, eip712_domain)
+
+        self._items[itemhash] = item
+        self.queue[item] = self._children[itemhash]
+        return item
+
+    def preload(self, workers: int = 1):
+        """Parse (and verify) all items that have not been accessed yet"""
+
+        if not self._unloaded:
+            return
+
+        assert self._storage  # NOTE: Can only have unloaded items if loaded
+        itemhashes = list(self._unloaded)
+        queue_items = _load_items(
+            self._storage,
+            [
+                (domain_separator, itemhash, eip712_domain)
+                for itemhash, (
+                    domain_separator,
+                    eip712_domain,
+                    _,
+                ) in self._unloaded.items()
+            ],
+            workers=workers,
+        )
 
-        elif not path.exists():
-            path.mkdir(parents=True)
+        for itemhash, item in zip(itemhashes, queue_items):
+            self._load_item(itemhash, item=item)
 
-        elif not path.is_dir():
-            raise RuntimeError(f"Cannot save queue to '{path}'.")
+    def save(self, path: Path | str | None = None):
+        """
+        Save queue to ``path`` (defaults to where it was loaded from).
 
-        for item in self.queue.keys():
-            assert isinstance(domain := item.message._eip712_domain_, EIP712Domain)
-            domain_separator = hash_domain(domain.model_dump(exclude_none=True))
-            (domain_folder := path / domain_separator.hex()).mkdir(exist_ok=True)
-            if not (domain_file := domain_folder / "domain.json").exists():
-                domain_file.write_text(domain.model_dump_json(exclude_none=True))
-            (domain_folder / item.hash.hex()).mkdir(exist_ok=True)
-            item.save(domain_folder / item.hash.hex())
+        NOTE: When saving to where it was loaded from, only items and signatures that were added
+              since the last load/save are written.
+        """
+        # NOTE: Otherwise we'd have an import cycle
+        from .storage import QueueStorage
+
+        if path is not None:
+            storage = QueueStorage.from_path(path)
+
+        elif not (storage := self._storage):
+            storage = self._storage = QueueStorage.from_path(USER_QUEUE_PATH)
+
+        if storage != self._storage:
+            # NOTE: Unloaded items are unmodified, so only need to load them if moving
+            self.preload()
+            storage.save(self.queue.keys())
+            return
+
+        storage.save(
+            [
+                self._items[h]
+                for h, signers in self._modified.items()
+                if signers is None
+            ],
+            signatures=[
+                (self._items[h], signers)
+                for h, signers in self._modified.items()
+                if signers is not None
+            ],
+        )
+        self._modified.clear()
 
     @property
     def size(self) -> int:
-        return len(self.queue)
+        return len(self.queue) + len(self._unloaded)
 
     def __repr__(self) -> str:
         return (
@@ -200,22 +335,20 @@ class QueueManager(BaseModel):
         )
 
     def find(self, itemhash: HexBytes) -> QueueItem:
-        try:
-            return next(i for i in self.queue.keys() if i.hash == itemhash)
-        except StopIteration:
-            raise IndexError(f"{itemhash.to_0x_hex()} not in {self.__class__.__name__}")
+        if (item := self._items.get(itemhash)) is not None:
+            return item
+
+        elif itemhash in self._unloaded:
+            return self._load_item(itemhash)
+
+        raise IndexError(f"{itemhash.to_0x_hex()} not in {self.__class__.__name__}")
 
     def __contains__(self, item: QueueItem | Modify | Execute | HexBytes) -> bool:
         if isinstance(item, QueueItem):
-            return item in self.queue
+            return item in self.queue or item.hash in self._unloaded
 
         elif isinstance(item, HexBytes):
-            try:
-                self.find(item)
-                return True
-
-            except IndexError:
-                return False
+            return item in self._items or item in self._unloaded
 
         return self.__contains__(item.hash)
 
@@ -229,41 +362,62 @@ class QueueManager(BaseModel):
         return self.find(item.parent)
 
     def children(self, item: QueueItem | HexBytes) -> list[QueueItem]:
-        if isinstance(item, QueueItem):
-            return [self.find(child_hash) for child_hash in self.queue[item]]
         # NOTE: Makes sure this works for `self.base` (which is not in .keys())
-        return [k for k in self.queue.keys() if k.parent == item]
+        itemhash = item.hash if isinstance(item, QueueItem) else item
+        return [
+            self.find(child_hash) for child_hash in self._children.get(itemhash, [])
+        ]
 
     def add(self, item: QueueItem):
         """Add and item to the queue, creating a new entry for itself as a parent"""
 
-        if item in self.queue:
+        if item.hash in self:
             raise IndexError(f"{item} already in {self}")
 
-        if item.parent != self.base:
-            # NOTE: Try to append to children of parent first, as it might raise
-            try:
-                self.queue[self.parent(item)].append(item.hash)
+        if item.parent != self.base and item.parent not in self:
+            raise IndexError(f"{item.parent} not in {self}")
 
-            except KeyError as e:
-                raise IndexError(f"{item.parent} not in {self}") from e
-
-        # NOTE: New queue item has no children
-        self.queue[item] = list()
+        self._children.setdefault(item.parent, []).append(item.hash)
+        self._items[item.hash] = item
+        # NOTE: New queue item has no children (unless some were indexed already)
+        self.queue[item] = self._children.setdefault(item.hash, [])
+        self._modified[item.hash] = None
 
     def add_confirmations(
         self, itemhash: HexBytes, signatures: dict[AddressType, MessageSignature]
     ):
         self.find(itemhash).signatures.update(signatures)
 
+        # NOTE: If `None`, the whole item has not been saved yet anyways
+        if (signers := self._modified.setdefault(itemhash, set())) is not None:
+            signers.update(signatures)
+
     def get_branch(self, head: HexBytes) -> tuple[QueueItem, ...]:
         """Get sequence of QueueItems that take you from ``self.base`` to ``head``."""
 
-        if head == self.base:
-            return tuple()
+        if (branch := self._branches.get(head)) is not None:
+            return branch
+
+        # NOTE: Walk back until we find `self.base` (or a branch we've already computed)
+        path, itemhash = [], head
+        while itemhash != self.base:
+            if (branch := self._branches.get(itemhash)) is not None:
+                break
+
+            path.append(item := self.find(itemhash))
+            itemhash = item.parent
+
+        else:
+            branch = tuple()
+
+        branch = (*branch, *reversed(path))
 
-        item = self.find(head)
-        return tuple([*self.get_branch(item.parent), item])
+        if len(self._branches) >= self.MAX_CACHED_BRANCHES:
+            # NOTE: Drop the oldest entry
+            del self._branches[next(iter(self._branches))]
+
+        self._branches[head] = branch
+        return branch
 
     def rebase(self, new_base: HexBytes) -> int:
         """Update to ``new_base``, pruning all stale items from index"""
@@ -271,15 +425,60 @@ class QueueManager(BaseModel):
         if new_base == self.base:
             return 0  # noop
 
-        stale_items = self.children(self.base)
+        return len(self._prune(new_base))
+
+    def _prune(self, new_base: HexBytes) -> dict[HexBytes, EIP712Domain]:
+        # NOTE: All branches start from `self.base`
+        self._branches.clear()
+
+        # NOTE: Walk by hash, so that stale items never have to be loaded
+        stale_hashes = list(self._children.get(self.base, []))
+
+        items_dropped = {}
+        while stale_hashes:
+            if (itemhash := stale_hashes.pop()) != new_base:
+                # NOTE: Children of `new_base` are still valid, so keep them indexed
+                stale_hashes.extend(self._children.pop(itemhash))
 
-        items_dropped = 0
-        while stale_items:
-            if (item := stale_items.pop()).hash != new_base:
-                stale_items.extend(self.children(item))
+            if itemhash in self._unloaded:
+                _, eip712_domain, _ = self._unloaded.pop(itemhash)
 
-            del self.queue[item]
-            items_dropped += 1
+            else:
+                del self.queue[item := self._items.pop(itemhash)]
+                eip712_domain = item.message._eip712_domain_
 
+            self._modified.pop(itemhash, None)
+            items_dropped[itemhash] = eip712_domain
+
+        self._children.pop(self.base, None)
         self.base = new_base
         return items_dropped
+
+    def compact(self) -> tuple[int, int]:
+        """
+        Delete all items (from index and storage) that are ancestors of ``self.base`` (so have
+        already been executed), or that are siblings superseded by those ancestors.
+
+        Returns the number of items deleted, and the number of bytes reclaimed in storage.
+        """
+
+        # NOTE: Find the oldest ancestor of `self.base` that we know of
+        root = self.base
+        while root in self._items or root in self._unloaded:
+            root = (
+                self._items[root].parent
+                if root in self._items
+                else self._unloaded[root][2]
+            )
+
+        if root == self.base:
+            return 0, 0  # NOTE: No ancestors in queue
+
+        # NOTE: Pretend we were still based on `root`, and prune up to `self.base`
+        base, self.base = self.base, root
+        items_dropped = self._prune(base)
+
+        if not self._storage:
+            return len(items_dropped), 0
+
+        return len(items_dropped), self._storage.delete(items_dropped)
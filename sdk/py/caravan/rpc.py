@@ -0,0 +1,98 @@
+from typing import TYPE_CHECKING, Any
+
+from ape.exceptions import ProviderError
+from ape.logging import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from ape.api import ProviderAPI
+    from ape.types import ContractLog, LogFilter
+
+# NOTE: Most RPC providers limit the number of requests allowed in a single batch
+MAX_BATCH_SIZE = 100
+
+# NOTE: Max number of blocks to request logs for at once
+MAX_LOG_RANGE = 10_000
+
+
+def batch_requests(
+    provider: "ProviderAPI",
+    requests: list[tuple[str, list]],
+    batch_size: int = MAX_BATCH_SIZE,
+) -> list[Any]:
+    """
+    Make all JSON-RPC ``requests`` (as ``(method, params)``) using as few round trips as possible,
+    returning the result of each request (in order).
+
+    NOTE: If the provider does not support batched requests, they are made one at a time instead.
+    """
+    results: list[Any] = []
+    for start in range(0, len(requests), batch_size):
+        batch = requests[start : start + batch_size]
+
+        try:
+            responses = provider.web3.provider.make_batch_request(batch)
+
+        except (AttributeError, NotImplementedError):
+            # NOTE: Not a web3 provider, or its web3 provider does not support batching
+            responses = None
+
+        if (
+            isinstance(responses, list)
+            and len(responses) == len(batch)
+            and all("result" in r for r in responses)
+        ):
+            results.extend(r["result"] for r in responses)
+
+        else:
+            # NOTE: e.g. the RPC rejected the batch, or a request in it failed
+            logger.debug(f"Batch of {len(batch)} requests failed, sending separately")
+            # NOTE: Make each request separately to raise the proper error (if any)
+            results.extend(
+                provider.make_request(method, params) for method, params in batch
+            )
+
+    return results
+
+
+def get_logs(
+    provider: "ProviderAPI",
+    log_filter: "LogFilter",
+    start_block: int,
+    stop_block: int,
+    max_range: int = MAX_LOG_RANGE,
+) -> "Iterator[tuple[int, list[ContractLog]]]":
+    """
+    Yield ``(last_block, logs)`` for consecutive ranges of blocks from ``start_block`` up to
+    ``stop_block`` (inclusive), with all logs matching ``log_filter`` in that range (in order).
+
+    NOTE: The size of each range adapts, it is halved whenever the RPC rejects a request (e.g.
+          for returning too many results) and grows back after each successful request.
+    """
+    range_size = max_range
+    while start_block <= stop_block:
+        last_block = min(start_block + range_size - 1, stop_block)
+        page_filter = log_filter.model_copy(
+            update={"start_block": start_block, "stop_block": last_block}
+        )
+
+        try:
+            # NOTE: Using JSON mode since used as request data
+            logs = provider.make_request(
+                "eth_getLogs", [page_filter.model_dump(mode="json")]
+            )
+
+        except ProviderError:
+            if range_size == 1:
+                raise
+
+            range_size //= 2
+            continue
+
+        yield (
+            last_block,
+            list(provider.network.ecosystem.decode_logs(logs, *log_filter.events)),
+        )
+        start_block = last_block + 1
+        range_size = min(range_size * 2, max_range)
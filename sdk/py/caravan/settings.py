@@ -23,3 +23,8 @@ USER_CONFIG_DIR: Path = (
     else (Path.home() / ".config")
 ) / "caravan"
 USER_CONFIG_DIR.mkdir(exist_ok=True)
+
+# NOTE: Either a directory (default), or a SQLite database file (e.g. `queue.db`)
+USER_QUEUE_PATH: Path = (
+    Path(value) if (value := os.environ.get("CARAVAN_QUEUE_PATH")) else USER_CACHE_DIR
+)
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from typing import Any
+
+from ape.types import AddressType, MessageSignature
+from eth_account import Account
+
+from .cache import PersistedCache
+from .settings import USER_CACHE_DIR
+
+
+class SignatureCache(PersistedCache):
+    """
+    Bounded (LRU) cache of signers recovered from ``(msghash, signature)`` pairs.
+
+    ``ecrecover`` is deterministic, so a pair only ever needs to be recovered once, even across
+    processes (if persisted).
+
+    NOTE: A persisted cache is only as trustworthy as the cache folder it is stored in.
+    """
+
+    DEFAULT_PATH = USER_CACHE_DIR / ".signatures.json"
+
+    def __init__(self, maxsize: int = 4096):
+        super().__init__()
+        self.maxsize = maxsize
+
+        self._cache: OrderedDict[tuple[bytes, bytes], AddressType] = OrderedDict()
+
+    def _insert(self, key: tuple[bytes, bytes], signer: AddressType):
+        self._cache[key] = signer
+        self._cache.move_to_end(key)
+
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def recover_signer(
+        self, msghash: bytes, signature: MessageSignature
+    ) -> AddressType:
+        """Get the address that signed ``msghash``, recovering it only if not cached."""
+
+        key = (bytes(msghash), signature.encode_rsv())
+        with self._lock:
+            if (signer := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                return signer
+
+        # NOTE: Recover w/o lock held, worst case is recovering the same signature twice
+        signer = AddressType(Account._recover_hash(key[0], signature=key[1]))
+        self.add(msghash, signature, signer)
+        return signer
+
+    def add(self, msghash: bytes, signature: MessageSignature, signer: AddressType):
+        """Add an already-verified ``signer`` of ``msghash`` to the cache."""
+
+        with self._lock:
+            self._insert((bytes(msghash), signature.encode_rsv()), signer)
+            self._modified = True
+
+    def _load(self, entries: Any):
+        # NOTE: Entries are saved least-recently used first
+        for msghash, signature, signer in reversed(entries):
+            key = (bytes.fromhex(msghash), bytes.fromhex(signature))
+            # NOTE: Don't override (more recent) entries already in memory
+            if key not in self._cache:
+                self._cache[key] = AddressType(signer)
+                self._cache.move_to_end(key, last=False)
+
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _dump(self) -> Any:
+        return [
+            (msghash.hex(), signature.hex(), signer)
+            for (msghash, signature), signer in self._cache.items()
+        ]
+
+
+# NOTE: Process-wide cache, shared by everything that verifies signatures
+SIGNATURE_CACHE = SignatureCache()
+
+
+def recover_signer(msghash: bytes, signature: MessageSignature) -> AddressType:
+    return SIGNATURE_CACHE.recover_signer(msghash, signature)
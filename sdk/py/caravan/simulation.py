@@ -0,0 +1,184 @@
+import hashlib
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Self
+
+from ape.exceptions import ContractLogicError
+from ape.types import HexBytes
+from ape.utils import ManagerAccessMixin
+
+from .cache import PersistedCache
+from .settings import USER_CACHE_DIR
+
+if TYPE_CHECKING:
+    from ape.api.accounts import ImpersonatedAccount
+    from eip712 import EIP712Domain
+
+    from .main import Caravan
+    from .messages import Execute
+
+
+class SimulationSession(ManagerAccessMixin):
+    """
+    A single simulated chain (a fork of the connected network, or an isolated snapshot if it is
+    already a development network), kept alive across many simulated batches.
+
+    Each batch simulated in the session (see ``simulate``) is applied on top of the previous
+    ones, including moving the Wallet's ``head`` to the batch's hash, so that the next batch
+    sees the state as if all previous batches were executed. Since the same fork is used for
+    the whole session, remote state already fetched by the fork is also reused.
+
+    Usage example::
+
+        with SimulationSession(van) as session:
+            for batch in batches:
+                with batch.add_from_simulation(session=session) as van_account:
+                    ...
+
+        van.stage_many(session.batches)
+    """
+
+    def __init__(self, van: "Caravan"):
+        self.van = van
+        # NOTE: All batches simulated in the session (in order)
+        self.batches: list["Execute"] = []
+
+        self._context: Any = None
+
+    def __enter__(self) -> Self:
+        if self._context is not None:
+            raise RuntimeError("Simulation session already started")
+
+        self._context = (
+            self.chain_manager.isolate()
+            if self.provider.network.is_dev
+            else self.network_manager.fork()
+        )
+        self._context.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        context, self._context = self._context, None
+        try:
+            return context.__exit__(*exc_info)
+
+        finally:
+            # NOTE: Cached while simulating (e.g. `head`), which no longer matches the chain
+            self.van.invalidate_state()
+
+    def apply(self, batch: "Execute"):
+        """Execute the calls of an already-simulated ``batch``, as if it was simulated here."""
+
+        if self._context is None:
+            raise RuntimeError("Simulation session not started")
+
+        if batch.parent != self.van.head:
+            self.van.set_head(batch.parent)
+
+        with self.account_manager.use_sender(self.van.address) as van_account:
+            for call in batch.calls:
+                try:
+                    van_account.transfer(call.target, call.value, data=call.data)
+
+                except ContractLogicError:
+                    if call.success_required:
+                        raise
+
+                    # NOTE: Allowed to fail, so the rest of the batch still executes
+
+        self.van.set_head(batch.hash)
+        self.batches.append(batch)
+
+    @contextmanager
+    def simulate(
+        self, batch: "Execute"
+    ) -> Generator["ImpersonatedAccount", None, None]:
+        """Add all transactions sent by the Wallet inside this context as calls in ``batch``."""
+
+        if self._context is None:
+            raise RuntimeError("Simulation session not started")
+
+        if batch.parent != self.van.head:
+            # NOTE: e.g. simulating a branch that is not the latest one
+            self.van.set_head(batch.parent)
+
+        with self.account_manager.use_sender(self.van.address) as van_account:
+            starting_nonce = van_account.nonce
+            yield van_account
+
+        for txn in van_account.history[starting_nonce:]:
+            batch.add_from_receipt(txn)
+
+        # NOTE: The calls were already executed, now "execute" the batch itself
+        self.van.set_head(batch.hash)
+        self.batches.append(batch)
+
+
+class SimulationCache(PersistedCache):
+    """
+    Cache of the batches produced by simulating queue scripts, by the script's content, the
+    batch's parent (the head it was simulated from), and the Wallet's EIP712 domain.
+
+    A script only needs to be simulated again when any of those changes.
+
+    NOTE: Anything else that the script reads (e.g. other contracts' state) is not part of the
+          key, so clear the cache (see ``clear``) if a script depends on it.
+    """
+
+    DEFAULT_PATH = USER_CACHE_DIR / ".simulations.json"
+
+    def __init__(self):
+        super().__init__()
+
+        self._cache: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def key(script: bytes, parent: bytes, domain: "EIP712Domain") -> str:
+        return ":".join(
+            (
+                hashlib.sha256(script).hexdigest(),
+                HexBytes(parent).to_0x_hex(),
+                str(domain.chainId),
+                str(domain.verifyingContract),
+                str(domain.version),
+            )
+        )
+
+    def get(self, van: "Caravan", script: bytes, parent: bytes) -> "Execute | None":
+        """Re-create the batch produced by ``script`` from ``parent`` (if it was cached)."""
+
+        batch = van.new_batch(parent=parent)
+        key = self.key(script, parent, batch._eip712_domain_)
+        with self._lock:
+            entry = self._cache.get(key)
+
+        if entry is None:
+            return None
+
+        # NOTE: Otherwise we'd have an import cycle
+        from .messages.execute import Call
+
+        batch.calls = [Call.model_validate(call) for call in entry["calls"]]
+        if batch.hash != HexBytes(entry["hash"]):
+            # NOTE: Should not happen, unless message encoding changed since it was cached
+            with self._lock:
+                self._cache.pop(key, None)
+                self._modified = True
+
+            return None
+
+        return batch
+
+    def add(self, script: bytes, batch: "Execute"):
+        key = self.key(script, batch.parent, batch._eip712_domain_)
+        entry = dict(
+            calls=[call.model_dump(mode="json") for call in batch.calls],
+            hash=batch.hash.to_0x_hex(),
+        )
+        with self._lock:
+            self._cache[key] = entry
+            self._modified = True
+
+
+# NOTE: Process-wide cache, shared by everything that simulates queue scripts
+SIMULATION_CACHE = SimulationCache()
@@ -0,0 +1,545 @@
+import json
+import os
+import shutil
+import sqlite3
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ape.types import AddressType, HexBytes
+from eip712 import EIP712Domain
+
+from .queue import QueueItem, hash_domain
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+
+class QueueStorage(ABC):
+    """Backend that ``QueueManager`` uses to persist Caravan's off-chain queue"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        # NOTE: Cache, so we don't re-hash the same domain for every item we save
+        self._domain_separators: dict[str, HexBytes] = {}
+
+    @staticmethod
+    def from_path(path: Path | str) -> "QueueStorage":
+        """Pick the storage backend to use, based on ``path``."""
+
+        if isinstance(path, str):
+            path = Path(path)
+
+        if path.suffix in SQLiteStorage.SUFFIXES:
+            return SQLiteStorage(path)
+
+        elif path.suffix in ZipStorage.SUFFIXES:
+            return ZipStorage(path)
+
+        elif path.exists() and not path.is_dir():
+            raise RuntimeError(
+                f"Path '{path}' must be a directory, zip archive or database file."
+            )
+
+        return DirectoryStorage(path)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, QueueStorage)
+            and other.__class__ == self.__class__
+            and other.path.resolve() == self.path.resolve()
+        )
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def domain_separator(self, eip712_domain: EIP712Domain) -> HexBytes:
+        if (
+            domain_json := eip712_domain.model_dump_json(exclude_none=True)
+        ) not in self._domain_separators:
+            self._domain_separators[domain_json] = hash_domain(
+                eip712_domain.model_dump(exclude_none=True)
+            )
+
+        return self._domain_separators[domain_json]
+
+    @abstractmethod
+    def domains(self) -> "Iterator[tuple[HexBytes, EIP712Domain]]":
+        """Iterate over all ``(domainSeparator, domain)`` pairs in storage."""
+
+    @abstractmethod
+    def index(
+        self, domain_separator: HexBytes
+    ) -> "Iterator[tuple[HexBytes, HexBytes]]":
+        """Iterate over ``(msghash, parent)`` for every message stored in a domain."""
+
+    @abstractmethod
+    def load_item(
+        self,
+        domain_separator: HexBytes,
+        itemhash: HexBytes,
+        eip712_domain: EIP712Domain,
+    ) -> QueueItem:
+        """Parse (and verify) item ``itemhash`` from storage."""
+
+    @abstractmethod
+    def save(
+        self,
+        items: "Iterable[QueueItem]",
+        signatures: "Iterable[tuple[QueueItem, set[AddressType]]]" = (),
+    ):
+        """
+        Write (or update) ``items`` in storage, and write just the signatures from the given
+        signers for each item in ``signatures`` (which must already be in storage).
+        """
+
+    @abstractmethod
+    def delete(self, items: dict[HexBytes, EIP712Domain]) -> int:
+        """Delete ``items`` (msghash => domain) from storage, returning bytes reclaimed."""
+
+
+class DirectoryStorage(QueueStorage):
+    """
+    Store queue as a directory, using the following structure:
+
+    ```
+    <msg.eip712_domain.hash>/
+        domain.json => msg.eip712_domain.model_dump_json()
+        <msg.hash>/
+            message.json => msg.model_dump_json()
+            signatures/
+                <signer> => signature.encode_rsv()
+    ...  # For other domains (supports multiple wallets and versions)
+    ```
+    """
+
+    def domains(self) -> "Iterator[tuple[HexBytes, EIP712Domain]]":
+        for domain_folder in self.path.iterdir():
+            if domain_folder.name.startswith("."):
+                continue  # NOTE: Not a domain (e.g. `SIGNATURE_CACHE`)
+
+            # NOTE: Each message is located at `<root> / <domainSeparator> / <messageHash>`
+            #       This allows us to have messages indexed by `<domainSeparator>`, which
+            #       supports indexing version upgrades, as well as more than one wallet at time
+            if not domain_folder.is_dir():
+                raise RuntimeError(
+                    f"Corrupted queue: '{domain_folder.name}' is not a folder."
+                )
+
+            elif not (domain_file := domain_folder / "domain.json").exists():
+                raise RuntimeError(
+                    f"Corrupted queue: '{domain_folder.name}' does not contain domain file."
+                )
+
+            yield (
+                HexBytes(domain_folder.name),
+                EIP712Domain.model_validate_json(domain_file.read_text()),
+            )
+
+    def index(
+        self, domain_separator: HexBytes
+    ) -> "Iterator[tuple[HexBytes, HexBytes]]":
+        if not (domain_folder := self.path / domain_separator.hex()).is_dir():
+            return
+
+        for item_folder in domain_folder.iterdir():
+            if not item_folder.is_dir():
+                continue  # NOTE: Skip `domain.json`
+
+            message = json.loads((item_folder / "message.json").read_text())
+            yield HexBytes(item_folder.name), HexBytes(message["parent"])
+
+    def load_item(
+        self,
+        domain_separator: HexBytes,
+        itemhash: HexBytes,
+        eip712_domain: EIP712Domain,
+    ) -> QueueItem:
+        return QueueItem.load(
+            self.path / domain_separator.hex() / itemhash.hex(),
+            eip712_domain=eip712_domain,
+        )
+
+    def item_folder(self, item: QueueItem) -> Path:
+        assert isinstance(domain := item.message._eip712_domain_, EIP712Domain)
+        return self.path / self.domain_separator(domain).hex() / item.hash.hex()
+
+    def save(
+        self,
+        items: "Iterable[QueueItem]",
+        signatures: "Iterable[tuple[QueueItem, set[AddressType]]]" = (),
+    ):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        for item in items:
+            domain_folder = (item_folder := self.item_folder(item)).parent
+            domain_folder.mkdir(exist_ok=True)
+            if not (domain_file := domain_folder / "domain.json").exists():
+                domain_file.write_text(
+                    item.message._eip712_domain_.model_dump_json(exclude_none=True)
+                )
+            item_folder.mkdir(exist_ok=True)
+            item.save(item_folder)
+
+        for item, signers in signatures:
+            (sigs_folder := self.item_folder(item) / "signatures").mkdir(exist_ok=True)
+            for signer in signers:
+                (sigs_folder / str(signer)).write_bytes(
+                    item.signatures[signer].encode_rsv()
+                )
+
+    def delete(self, items: dict[HexBytes, EIP712Domain]) -> int:
+        bytes_reclaimed = 0
+        for itemhash, eip712_domain in items.items():
+            item_folder = self.path / self.domain_separator(eip712_domain).hex()
+            if not (item_folder := item_folder / itemhash.hex()).exists():
+                continue
+
+            bytes_reclaimed += sum(
+                f.stat().st_size for f in item_folder.rglob("*") if f.is_file()
+            )
+            shutil.rmtree(item_folder)
+
+        return bytes_reclaimed
+
+
+class SQLiteStorage(QueueStorage):
+    """Store queue in a single SQLite database file, indexed by domain, msghash and parent"""
+
+    SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS domains (
+        separator BLOB PRIMARY KEY,
+        domain TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS messages (
+        hash BLOB PRIMARY KEY,
+        domain BLOB NOT NULL REFERENCES domains(separator),
+        parent BLOB NOT NULL,
+        message TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS messages_domain ON messages(domain);
+    CREATE INDEX IF NOT EXISTS messages_parent ON messages(parent);
+    CREATE TABLE IF NOT EXISTS signatures (
+        message BLOB NOT NULL REFERENCES messages(hash),
+        signer TEXT NOT NULL,
+        signature BLOB NOT NULL,
+        PRIMARY KEY (message, signer)
+    );
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._connection: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict:
+        # NOTE: Connections can't be shared w/ other processes (see `QueueManager.load`)
+        return {**self.__dict__, "_connection": None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.executescript(self.SCHEMA)
+
+        return self._connection
+
+    def domains(self) -> "Iterator[tuple[HexBytes, EIP712Domain]]":
+        for separator, domain in self.connection.execute(
+            "SELECT separator, domain FROM domains"
+        ):
+            yield HexBytes(separator), EIP712Domain.model_validate_json(domain)
+
+    def index(
+        self, domain_separator: HexBytes
+    ) -> "Iterator[tuple[HexBytes, HexBytes]]":
+        for itemhash, parent in self.connection.execute(
+            "SELECT hash, parent FROM messages WHERE domain = ?",
+            (bytes(domain_separator),),
+        ):
+            yield HexBytes(itemhash), HexBytes(parent)
+
+    def load_item(
+        self,
+        domain_separator: HexBytes,
+        itemhash: HexBytes,
+        eip712_domain: EIP712Domain,
+    ) -> QueueItem:
+        if not (
+            row := self.connection.execute(
+                "SELECT message FROM messages WHERE hash = ? AND domain = ?",
+                (bytes(itemhash), bytes(domain_separator)),
+            ).fetchone()
+        ):
+            raise IndexError(f"{itemhash.to_0x_hex()} not in {self}")
+
+        raw_signatures = {
+            AddressType(signer): signature
+            for signer, signature in self.connection.execute(
+                "SELECT signer, signature FROM signatures WHERE message = ?",
+                (bytes(itemhash),),
+            )
+        }
+        return QueueItem.parse(
+            itemhash,
+            json.loads(row[0]),
+            raw_signatures,
+            eip712_domain=eip712_domain,
+            location=f"{self.path}:{itemhash.hex()}",
+        )
+
+    def save(
+        self,
+        items: "Iterable[QueueItem]",
+        signatures: "Iterable[tuple[QueueItem, set[AddressType]]]" = (),
+    ):
+        # NOTE: Write everything in one transaction
+        with self.connection as connection:
+            for item in items:
+                assert isinstance(domain := item.message._eip712_domain_, EIP712Domain)
+                domain_separator = self.domain_separator(domain)
+                connection.execute(
+                    "INSERT OR IGNORE INTO domains VALUES (?, ?)",
+                    (
+                        bytes(domain_separator),
+                        domain.model_dump_json(exclude_none=True),
+                    ),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)",
+                    (
+                        bytes(item.hash),
+                        bytes(domain_separator),
+                        bytes(item.parent),
+                        item.message.model_dump_json(),
+                    ),
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)",
+                    [
+                        (bytes(item.hash), str(signer), sig.encode_rsv())
+                        for signer, sig in item.signatures.items()
+                    ],
+                )
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)",
+                [
+                    (
+                        bytes(item.hash),
+                        str(signer),
+                        item.signatures[signer].encode_rsv(),
+                    )
+                    for item, signers in signatures
+                    for signer in signers
+                ],
+            )
+
+    def size(self) -> int:
+        page_count, page_size = self.connection.execute(
+            "SELECT * FROM pragma_page_count(), pragma_page_size()"
+        ).fetchone()
+        return page_count * page_size
+
+    def delete(self, items: dict[HexBytes, EIP712Domain]) -> int:
+        starting_size = self.size()
+
+        with self.connection as connection:
+            itemhashes = [(bytes(itemhash),) for itemhash in items]
+            connection.executemany(
+                "DELETE FROM signatures WHERE message = ?", itemhashes
+            )
+            connection.executemany("DELETE FROM messages WHERE hash = ?", itemhashes)
+
+        # NOTE: Space is not released until the database is re-packed
+        self.connection.execute("VACUUM")
+        return starting_size - self.size()
+
+
+class ZipStorage(QueueStorage):
+    """
+    Store queue as a (compressed) zip archive, using the same layout as ``DirectoryStorage``.
+
+    Members are read directly from the archive on demand, without extracting it.
+    """
+
+    SUFFIXES = (".zip",)
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._archive: zipfile.ZipFile | None = None
+        # domainSeparator => msghash => list[signer]
+        self._members: dict[str, dict[str, list[str]]] | None = None
+        self._domain_files: set[str] = set()
+
+    def __getstate__(self) -> dict:
+        # NOTE: Open archives can't be shared w/ other processes (see `QueueManager.load`)
+        return {**self.__dict__, "_archive": None, "_members": None}
+
+    @property
+    def archive(self) -> zipfile.ZipFile:
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.path)
+
+        return self._archive
+
+    @property
+    def members(self) -> dict[str, dict[str, list[str]]]:
+        if self._members is not None:
+            return self._members
+
+        # NOTE: Index all members once, so we never have to scan the archive again
+        self._members = {}
+        for name in self.archive.namelist():
+            match name.rstrip("/").split("/"):
+                case [domain, "domain.json"]:
+                    self._members.setdefault(domain, {})
+                    self._domain_files.add(domain)
+
+                case [domain, itemhash, "message.json"]:
+                    self._members.setdefault(domain, {}).setdefault(itemhash, [])
+
+                case [domain, itemhash, "signatures", signer]:
+                    self._members.setdefault(domain, {}).setdefault(
+                        itemhash, []
+                    ).append(signer)
+
+        return self._members
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+
+        self._archive = None
+        self._members = None
+        self._domain_files = set()
+
+    def domains(self) -> "Iterator[tuple[HexBytes, EIP712Domain]]":
+        for domain in self.members:
+            if domain not in self._domain_files:
+                raise RuntimeError(
+                    f"Corrupted queue: '{domain}' does not contain domain file."
+                )
+
+            yield (
+                HexBytes(domain),
+                EIP712Domain.model_validate_json(
+                    self.archive.read(f"{domain}/domain.json")
+                ),
+            )
+
+    def index(
+        self, domain_separator: HexBytes
+    ) -> "Iterator[tuple[HexBytes, HexBytes]]":
+        for itemhash in self.members.get(domain := domain_separator.hex(), {}):
+            message = json.loads(self.archive.read(f"{domain}/{itemhash}/message.json"))
+            yield HexBytes(itemhash), HexBytes(message["parent"])
+
+    def load_item(
+        self,
+        domain_separator: HexBytes,
+        itemhash: HexBytes,
+        eip712_domain: EIP712Domain,
+    ) -> QueueItem:
+        prefix = f"{domain_separator.hex()}/{itemhash.hex()}"
+        if (
+            signers := self.members.get(domain_separator.hex(), {}).get(itemhash.hex())
+        ) is None:
+            raise IndexError(f"{itemhash.to_0x_hex()} not in {self}")
+
+        return QueueItem.parse(
+            itemhash,
+            json.loads(self.archive.read(f"{prefix}/message.json")),
+            {
+                AddressType(signer): self.archive.read(f"{prefix}/signatures/{signer}")
+                for signer in signers
+            },
+            eip712_domain=eip712_domain,
+            location=f"{self.path}:{prefix}",
+        )
+
+    def save(
+        self,
+        items: "Iterable[QueueItem]",
+        signatures: "Iterable[tuple[QueueItem, set[AddressType]]]" = (),
+    ):
+        new_members: dict[str, bytes | str] = {}
+        for item in items:
+            assert isinstance(domain := item.message._eip712_domain_, EIP712Domain)
+            domain_folder = self.domain_separator(domain).hex()
+            new_members[f"{domain_folder}/domain.json"] = domain.model_dump_json(
+                exclude_none=True
+            )
+            prefix = f"{domain_folder}/{item.hash.hex()}"
+            new_members[f"{prefix}/message.json"] = item.message.model_dump_json()
+            for signer, sig in item.signatures.items():
+                new_members[f"{prefix}/signatures/{signer}"] = sig.encode_rsv()
+
+        for item, signers in signatures:
+            assert isinstance(domain := item.message._eip712_domain_, EIP712Domain)
+            prefix = f"{self.domain_separator(domain).hex()}/{item.hash.hex()}"
+            for signer in signers:
+                new_members[f"{prefix}/signatures/{signer}"] = item.signatures[
+                    signer
+                ].encode_rsv()
+
+        self._rewrite(new_members=new_members)
+
+    def delete(self, items: dict[HexBytes, EIP712Domain]) -> int:
+        starting_size = self.path.stat().st_size
+        self._rewrite(
+            deleted_prefixes=tuple(
+                f"{self.domain_separator(eip712_domain).hex()}/{itemhash.hex()}/"
+                for itemhash, eip712_domain in items.items()
+            )
+        )
+        return starting_size - self.path.stat().st_size
+
+    def _rewrite(
+        self,
+        new_members: dict[str, bytes | str] | None = None,
+        deleted_prefixes: tuple[str, ...] = (),
+    ):
+        if not (new_members or deleted_prefixes):
+            return  # NOTE: Nothing changed, so don't re-write the whole archive
+
+        new_members = new_members or {}
+
+        # NOTE: Zip archives can't be updated in-place, so re-write (and then replace) it
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        with zipfile.ZipFile(
+            tmp_path, mode="w", compression=zipfile.ZIP_DEFLATED
+        ) as archive:
+            if self.path.exists():
+                for info in self.archive.infolist():
+                    if (
+                        info.filename not in new_members
+                        and not info.filename.startswith(deleted_prefixes)
+                    ):
+                        archive.writestr(info, self.archive.read(info))
+
+            for name, data in new_members.items():
+                archive.writestr(name, data)
+
+        self.close()
+        os.replace(tmp_path, self.path)
+
+
+def migrate(source: QueueStorage, destination: QueueStorage) -> int:
+    """Copy (and verify) every item in ``source`` into ``destination``."""
+
+    items = [
+        source.load_item(domain_separator, itemhash, eip712_domain)
+        for domain_separator, eip712_domain in source.domains()
+        for itemhash, _ in source.index(domain_separator)
+    ]
+    destination.save(items)
+    return len(items)
@@ -0,0 +1,85 @@
+import asyncio
+import inspect
+from typing import TYPE_CHECKING, Any
+
+from ape.types import HexBytes
+from ape.utils import ManagerAccessMixin
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .main import Caravan
+
+    HeadCallback = Callable[[HexBytes, HexBytes], Any]
+
+
+class HeadWatcher(ManagerAccessMixin):
+    """
+    Watch a Wallet's on-chain ``head`` for changes (e.g. a message executed by another party),
+    rebasing its (already loaded) queue and calling each registered callback with
+    ``(old_head, new_head)`` whenever it changes.
+
+    Usage example::
+
+        watcher = HeadWatcher(van)
+
+        @watcher.on_new_head
+        def notify(old_head, new_head):
+            ...
+
+        watcher.watch()  # or `await watcher.watch_async()`
+    """
+
+    def __init__(self, van: "Caravan", callbacks: "list[HeadCallback] | None" = None):
+        self.van = van
+        self.callbacks = list(callbacks or [])
+        self.head = self.read_head()
+
+    def on_new_head(self, callback: "HeadCallback") -> "HeadCallback":
+        self.callbacks.append(callback)
+        return callback
+
+    def read_head(self) -> HexBytes:
+        # NOTE: Storage slot 1 in contract is head (see `Caravan.set_head`), which is cheaper
+        #       to read than calling `head()`
+        return HexBytes(self.provider.get_storage(self.van.address, 1))
+
+    def _update(self, new_head: HexBytes) -> list[Any]:
+        old_head, self.head = self.head, new_head
+        # NOTE: The Wallet was modified (by someone else), so its cached state is stale
+        self.van.refresh_state()
+        # NOTE: No need to rebase if not loaded yet, it will load w/ the latest head
+        if "queue" in self.van.__dict__:
+            self.van.queue.rebase(new_head)
+
+        return [callback(old_head, new_head) for callback in self.callbacks]
+
+    def check(self) -> bool:
+        """Check ``head`` once, returning whether it changed."""
+
+        if (new_head := self.read_head()) == self.head:
+            return False
+
+        self._update(new_head)
+        return True
+
+    def watch(self, stop_block: int | None = None, **poll_args):
+        """Check ``head`` on every new block (until ``stop_block``, if given)."""
+
+        for _ in self.chain_manager.blocks.poll_blocks(
+            stop_block=stop_block, **poll_args
+        ):
+            self.check()
+
+    async def watch_async(self, poll_interval: float = 2.0):
+        """Check ``head`` every ``poll_interval`` seconds, awaiting any async callbacks."""
+
+        while True:
+            if (new_head := await asyncio.to_thread(self.read_head)) != self.head:
+                # NOTE: Refreshing state and rebasing the queue block too, so run them off the
+                #       event loop (coroutines from async callbacks are awaited back on the loop)
+                for result in await asyncio.to_thread(self._update, new_head):
+                    if inspect.isawaitable(result):
+                        await result
+
+            await asyncio.sleep(poll_interval)
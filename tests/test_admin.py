@@ -1,5 +1,8 @@
+from ape.types import MessageSignature
 from packaging.version import Version
 from caravan.messages import ActionType
+from caravan.queue import QueueItem
+from caravan.signatures import recover_signer
 
 
 def test_upgrade(VERSION, owners, create_release, singleton, van):
@@ -53,3 +56,57 @@ def test_rotate_signers(accounts, owners, van):
     ]
     assert van.signers[0] == accounts[1]
     assert van.signers[len(owners) - 1] == accounts[len(owners)]
+
+
+def test_merge_rotated_signers(accounts, owners, THRESHOLD, van):
+    new_signer = accounts[len(owners)]
+    rotate = ActionType.ROTATE_SIGNERS(
+        [new_signer.address], [owners[0].address], THRESHOLD, van=van
+    )
+    van.stage(rotate)
+
+    # NOTE: Executed after `rotate`, so only signatures from the rotated signers are valid
+    batch = van.new_batch(parent=rotate.hash).add_raw(owners[1 % len(owners)])
+    van.queue.add(
+        QueueItem(
+            message=batch,
+            signatures={
+                signer.address: signer.sign_message(batch)
+                for signer in [*owners[:THRESHOLD], new_signer]
+            },
+        )
+    )
+
+    _, (_, batch_args) = van._get_merge_calls(
+        van.queue.get_branch(batch.hash), van.state
+    )
+    sent_by = {
+        recover_signer(batch.hash, MessageSignature.from_rsv(sig))
+        for sig in batch_args[-1]
+    }
+    assert owners[0].address not in sent_by
+    assert len(sent_by) == THRESHOLD
+
+    van.merge(batch.hash, sender=owners[0])
+    assert van.head == batch.hash
+    assert new_signer in van.signers
+    assert owners[0] not in van.signers
+
+
+def test_configure_module(owners, singleton, van):
+    # NOTE: Any contract can be a module
+    module = singleton
+    assert module not in van.modules
+
+    msg = ActionType.CONFIGURE_MODULE(module.address, True, van=van)
+    van.stage(msg)
+    van.commit(msg, sender=owners[0])
+
+    # NOTE: Index is updated incrementally (from the last block it has scanned) after our commit
+    assert module in van.modules
+    assert [m.address for m in van.modules] == [module.address]
+
+    msg = ActionType.CONFIGURE_MODULE(module.address, False, van=van)
+    van.stage(msg)
+    van.commit(msg, sender=owners[0])
+    assert module not in van.modules
@@ -1,7 +1,14 @@
+import os
+import random
+import time
+
 import pytest
 from ape.utils import ZERO_ADDRESS
+from eip712 import hash_message
+from eth_account import Account
 from packaging.version import Version
-from caravan.messages import Execute
+from caravan.messages import ActionType, BatchBuilder, Execute, base
+from caravan.messages.encoding import hash_typed_data
 
 
 def test_size_limits():
@@ -23,3 +30,146 @@ def test_size_limits():
     with pytest.raises(RuntimeError):
         # Can't add more than `Execute.MAX_CALLS`
         txn.add_raw(ZERO_ADDRESS, data=b"\x00" * Execute.MAX_CALLDATA_SIZE)
+
+
+def test_hash_cache(monkeypatch):
+    hashes_computed = 0
+    original_hash_typed_data = base.hash_typed_data
+
+    def counting_hash_typed_data(domain, struct_hash):
+        nonlocal hashes_computed
+        hashes_computed += 1
+        return original_hash_typed_data(domain, struct_hash)
+
+    monkeypatch.setattr(base, "hash_typed_data", counting_hash_typed_data)
+
+    txn = Execute.new(
+        parent=b"\x00" * 32,
+        version=Version("0.1"),
+        address=ZERO_ADDRESS,
+        chain_id=1,
+    )
+    first_hash = txn.hash
+    assert txn.hash == first_hash
+    assert hashes_computed == 1
+
+    # NOTE: Modifying the message must invalidate the cached hash
+    txn.add_raw(ZERO_ADDRESS)
+    assert (second_hash := txn.hash) != first_hash
+    assert txn.hash == second_hash == hash_message(txn)
+    assert hashes_computed == 2
+
+    txn.parent = b"\x01" * 32
+    assert txn.hash != second_hash
+    assert hashes_computed == 3
+
+
+def test_batch_builder():
+    builder = BatchBuilder(
+        parent=b"\x00" * 32,
+        version=Version("0.1"),
+        address=ZERO_ADDRESS,
+        chain_id=1,
+    )
+    for idx in range(num_calls := 2 * Execute.MAX_CALLS + 3):
+        builder.add_transfer(ZERO_ADDRESS, idx)
+
+    assert len(builder) == num_calls
+    assert [len(batch.calls) for batch in builder.messages] == [
+        Execute.MAX_CALLS,
+        Execute.MAX_CALLS,
+        3,
+    ]
+    assert [call.value for batch in builder.messages for call in batch.calls] == list(
+        range(num_calls)
+    )
+    assert builder.messages[0].parent == b"\x00" * 32
+    assert all(
+        batch.parent == parent.hash
+        for parent, batch in zip(builder.messages, builder.messages[1:])
+    )
+    assert builder.head == builder.messages[-1].hash
+
+    # NOTE: A call that can't fit in any message does not leave an empty message behind
+    for _ in range(Execute.MAX_CALLS - 3):
+        builder.add_raw(ZERO_ADDRESS)
+
+    with pytest.raises(RuntimeError):
+        builder.add_raw(ZERO_ADDRESS, data=b"\x00" * (Execute.MAX_CALLDATA_SIZE + 1))
+
+    assert len(builder.messages) == 3
+
+
+@pytest.fixture(scope="module")
+def messages():
+    rng = random.Random(1337)
+    domains = [
+        dict(
+            version=Version(version),
+            address=Account.create().address,
+            chain_id=chain_id,
+        )
+        for version, chain_id in (("0.1", 1), ("1.0.2", 10), ("12.34", 2**64))
+    ]
+
+    msgs: list = []
+    for domain in domains:
+        for num_calls in range(Execute.MAX_CALLS + 1):
+            txn = Execute.new(parent=rng.randbytes(32), **domain)
+            for _ in range(num_calls):
+                txn.add_raw(
+                    Account.create().address,
+                    value=rng.randrange(2**256),
+                    success_required=rng.random() < 0.5,
+                    data=rng.randbytes(rng.randrange(200)),
+                )
+
+            msgs.append(txn)
+
+        msgs.extend(
+            [
+                ActionType.UPGRADE_IMPLEMENTATION(
+                    Account.create().address, parent=rng.randbytes(32), **domain
+                ),
+                ActionType.ROTATE_SIGNERS(
+                    [Account.create().address for _ in range(3)],
+                    [Account.create().address],
+                    2,
+                    parent=rng.randbytes(32),
+                    **domain,
+                ),
+                ActionType.CONFIGURE_MODULE(
+                    Account.create().address, True, parent=rng.randbytes(32), **domain
+                ),
+            ]
+        )
+
+    return msgs
+
+
+def test_encoding(messages):
+    for msg in messages:
+        # NOTE: Must be byte-for-byte the same as the generic EIP712 encoding
+        assert msg.hash == hash_message(msg)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("CARAVAN_BENCHMARK"), reason="Set CARAVAN_BENCHMARK to run"
+)
+def test_encoding_benchmark(record_property, messages):
+    def benchmark(hasher) -> float:
+        start = time.perf_counter()
+        for _ in range(10):
+            for msg in messages:
+                # NOTE: Clear memoized values, so every iteration encodes from scratch
+                msg._invalidate_hash()
+                hasher(msg)
+
+        return time.perf_counter() - start
+
+    # NOTE: Recorded (e.g. in `--junitxml` reports) instead of asserted, since timings vary
+    record_property("generic_time", benchmark(hash_message))
+    record_property(
+        "fast_time",
+        benchmark(lambda msg: hash_typed_data(msg._eip712_domain_, msg._struct_hash())),
+    )
@@ -0,0 +1,27 @@
+from ape.utils import ZERO_ADDRESS
+
+from caravan.metadata import WalletMetadataCache
+
+
+def test_metadata_cache(tmp_path):
+    cache = WalletMetadataCache()
+    cache.persist(path := tmp_path / "wallets.json")
+    cache.update(1, ZERO_ADDRESS, version="0.1")
+    cache.update(1, ZERO_ADDRESS, code_hash="00" * 32)
+    assert cache.get(1, ZERO_ADDRESS) == {"version": "0.1", "code_hash": "00" * 32}
+    # NOTE: Wallets are cached per chain
+    assert cache.get(2, ZERO_ADDRESS) == {}
+    cache.save()
+
+    reloaded = WalletMetadataCache()
+    reloaded.persist(path)
+    assert reloaded.get(1, ZERO_ADDRESS) == cache.get(1, ZERO_ADDRESS)
+
+    # NOTE: e.g. after the implementation is upgraded
+    reloaded.invalidate(1, ZERO_ADDRESS)
+    reloaded.save()
+    assert len(reloaded) == 0
+
+    cache = WalletMetadataCache()
+    cache.persist(path)
+    assert cache.get(1, ZERO_ADDRESS) == {}
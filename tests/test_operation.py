@@ -1,7 +1,13 @@
 import ape
 import pytest
+from ape_ethereum import multicall
+from ape_ethereum.multicall.exceptions import UnsupportedChainError
+from packaging.version import Version
 
+from caravan.history import EventIndex
 from caravan.messages import ActionType
+from caravan.simulation import SimulationCache, SimulationSession
+from caravan.watcher import HeadWatcher
 
 
 def test_configuration(networks, van, VERSION, THRESHOLD, owners):
@@ -37,6 +43,33 @@ def test_configuration(networks, van, VERSION, THRESHOLD, owners):
     )
 
 
+def test_state(monkeypatch, chain, van, VERSION, THRESHOLD, owners):
+    state = van.state
+    assert state.block_number == chain.blocks.height
+    assert state.head == van.contract.head()
+    assert state.threshold == THRESHOLD
+    assert set(state.signers) == set(o.address for o in owners)
+    assert state.version == VERSION
+
+    # NOTE: Always re-fetched on development networks
+    assert van.state is not state and van.state == state
+
+    # NOTE: Otherwise, re-used until it expires (or is refreshed)
+    monkeypatch.setattr(type(van.provider.network), "is_dev", False)
+    assert (state := van.refresh_state()) is van.state
+    chain.mine()
+    assert van.state is state
+    assert van.refresh_state() is not state
+    monkeypatch.setattr(van, "STATE_TTL", 0)
+    assert van.state is not van.state
+    monkeypatch.undo()
+
+    # NOTE: Modifying storage directly also refreshes it
+    van.set_head(new_head := b"\x01" * 32)
+    assert van.head == new_head
+    van.set_head(state.head)
+
+
 def test_initialize(singleton, van, THRESHOLD, owners):
     assert van.contract.IMPLEMENTATION() == singleton
 
@@ -49,6 +82,11 @@ def test_initialize(singleton, van, THRESHOLD, owners):
         van.contract.initialize(owners, THRESHOLD, sender=owners[0])
 
 
+def test_deployment_block(van):
+    assert van.provider.get_code(van.address, block_id=van.deployment_block)
+    assert not van.provider.get_code(van.address, block_id=van.deployment_block - 1)
+
+
 @pytest.mark.parametrize("calls", ["0_calls", "1_call", "2_calls"])
 def test_execute(accounts, van, owners, calls):
     msg = van.new_batch()
@@ -101,3 +139,229 @@ def test_execute(accounts, van, owners, calls):
     else:
         assert receipt.events == []
         assert van.contract.balance == starting_balance[van.contract.address]
+
+
+def test_onchain_approvals(monkeypatch, van, owners):
+    msgs = [van.new_batch(), van.new_batch().add_raw(owners[0])]
+    van.contract.set_approval(msgs[0].hash, sender=owners[0])
+    van.contract.set_approval(msgs[1].hash, sender=owners[-1])
+
+    expected = {msgs[0].hash: [owners[0].address], msgs[1].hash: [owners[-1].address]}
+    assert van.get_onchain_approvals(msg.hash for msg in msgs) == expected
+    assert van.onchain_approvals(msgs[0].hash) == expected[msgs[0].hash]
+
+    # NOTE: Results are the same no matter how many chunks it is split into
+    monkeypatch.setattr(van, "MAX_MULTICALL_SIZE", 1)
+    assert van.get_onchain_approvals(msg.hash for msg in msgs) == expected
+
+
+def test_multicall_unsupported(monkeypatch, chain, van, owners):
+    van.contract.set_approval(msghash := van.new_batch().hash, sender=owners[0])
+    expected_state = van.get_state()
+    expected_approvals = van.get_onchain_approvals([msghash])
+
+    def unsupported(*args, **kwargs):
+        raise UnsupportedChainError()
+
+    batches = []
+
+    def make_batch_request(requests):
+        # NOTE: The test provider does not support batching, so emulate it
+        batches.append(requests)
+        return [
+            dict(jsonrpc="2.0", id=idx, result=van.provider.make_request(*request))
+            for idx, request in enumerate(requests)
+        ]
+
+    monkeypatch.setattr(
+        van.provider.web3.provider,
+        "make_batch_request",
+        make_batch_request,
+        raising=False,
+    )
+
+    # NOTE: Falls back to batched JSON-RPC requests (storage reads for approvals)
+    monkeypatch.setattr(multicall.Call, "__call__", unsupported)
+    assert van.get_state(expected_state.block_number) == expected_state
+    assert len(batches) == 1
+    assert van.get_onchain_approvals([msghash]) == expected_approvals
+    assert len(batches) == 2
+
+
+def test_history(tmp_path, chain, accounts, van, owners):
+    index = EventIndex(tmp_path / "history.db")
+    index.update(van)
+    assert index.last_block(chain.chain_id, van.address) == chain.blocks.height
+
+    msg = van.new_batch().add_transfer(target=accounts[-3], value=1)
+    accounts[-1].transfer(van.contract, 1)
+    van.stage(msg)
+    van.commit(msg, sender=owners[0])
+
+    # NOTE: Only indexes new blocks (and re-indexes the most recent ones)
+    assert index.update(van) >= 1
+    events = list(
+        index.query(
+            chain.chain_id,
+            van.address,
+            events=["Executed"],
+            target=accounts[-3].address.lower(),
+        )
+    )
+    assert len(events) == 1
+    assert events[0]["arguments"]["value"] == 1
+
+    # NOTE: Re-indexing the same blocks does not duplicate events
+    index.update(van)
+    assert len(list(index.query(chain.chain_id, van.address, events=["Executed"]))) == 1
+
+
+def test_head_watcher(van):
+    watcher = HeadWatcher(van)
+    assert watcher.head == van.head and not watcher.check()
+
+    changes = []
+    watcher.on_new_head(lambda old, new: changes.append((old, new)))
+
+    van.stage(msg := van.new_batch())
+    assert msg in van.queue
+
+    # NOTE: Simulate another party executing `msg`
+    van.set_head(msg.hash)
+    assert watcher.check()
+    assert changes == [(msg.parent, msg.hash)]
+    assert van.queue.base == msg.hash and msg not in van.queue
+
+    van.set_head(msg.parent)
+    van.queue.rebase(msg.parent)
+
+
+def test_concurrent_signing(van, THRESHOLD):
+    # NOTE: Test accounts never prompt, so there is nothing to unlock
+    assert len(van.unlock_signers(autosign=True)) == 0
+
+    van.stage(msg := van.new_batch(), max_workers=4)
+    assert msg in van.queue
+    assert len(van.queue.find(msg.hash).signatures) == THRESHOLD
+
+
+def test_stage_many(van, owners, THRESHOLD):
+    msgs = [van.new_batch().add_raw(owners[idx % len(owners)]) for idx in range(3)]
+    items = van.stage_many(msgs, chain=True)
+
+    assert [item.message for item in items] == msgs
+    assert msgs[0].parent == van.head
+    assert all(msg.parent == parent.hash for parent, msg in zip(msgs, msgs[1:]))
+    assert all(len(item.signatures) == THRESHOLD for item in items)
+    assert van.queue.get_branch(msgs[-1].hash) == tuple(items)
+
+    van.merge(msgs[-1].hash, sender=owners[0])
+    assert van.head == msgs[-1].hash
+
+
+def test_batch_builder(van, owners):
+    builder = van.new_batches().add_raw(owners[0]).add_raw(owners[1 % len(owners)])
+    assert builder.messages[0] not in van.queue
+
+    # NOTE: Stages the chain first, since it was not staged yet
+    builder(sender=owners[0])
+    assert all(msg in van.queue for msg in builder.messages)
+    assert van.head == builder.head
+
+
+def test_merge_chunked(van, owners):
+    msgs = [van.new_batch().add_raw(owners[idx % len(owners)]) for idx in range(3)]
+    van.stage_many(msgs, chain=True)
+
+    # NOTE: Too small to fit more than one message per transaction
+    receipts = van.merge_chunked(msgs[-1].hash, max_gas=1, sender=owners[0])
+    assert len(receipts) == len(msgs)
+    assert [r.nonce for r in receipts] == list(
+        range(receipts[0].nonce, receipts[0].nonce + len(msgs))
+    )
+    assert van.head == msgs[-1].hash
+
+
+def test_simulation_session(van, owners):
+    head = van.head
+    with SimulationSession(van) as session:
+        with (first := van.new_batch()).add_from_simulation(session) as van_account:
+            owners[0].transfer(van_account, "2 ether")
+            van_account.transfer(owners[0], "1 ether")
+
+        # NOTE: The next batch sees the previous batch as executed
+        assert van.head == first.hash
+        with (second := van.new_batch()).add_from_simulation(session) as van_account:
+            van_account.transfer(owners[-1], 0)
+
+        assert second.parent == first.hash
+
+    assert session.batches == [first, second]
+    assert [len(batch.calls) for batch in session.batches] == [1, 1]
+    # NOTE: Nothing cached while simulating is left over
+    assert van._state is None
+    assert van.head == head
+
+    van.stage_many(session.batches)
+    assert first in van.queue and second in van.queue
+
+
+def test_simulation_cache(tmp_path, van, owners):
+    script = b"# Some queue script"
+    cache = SimulationCache()
+    assert cache.get(van, script, van.head) is None
+
+    with SimulationSession(van) as session:
+        with (batch := van.new_batch()).add_from_simulation(session) as van_account:
+            owners[0].transfer(van_account, "1 ether")
+            van_account.transfer(owners[-1], "0.5 ether", data=b"payroll")
+
+    cache.add(script, batch)
+    assert (cached_batch := cache.get(van, script, batch.parent)) == batch
+    assert cached_batch.hash == batch.hash
+
+    # NOTE: Different script content or parent is a cache miss
+    assert cache.get(van, b"# Another queue script", batch.parent) is None
+    assert cache.get(van, script, batch.hash) is None
+
+    cache.persist(path := tmp_path / ".simulations.json")
+    cache.save()
+
+    (cold_cache := SimulationCache()).persist(path)
+    assert cold_cache.get(van, script, batch.parent) == batch
+
+    # NOTE: Cached batches can be replayed in a session w/o running the script again
+    with SimulationSession(van) as session:
+        owners[0].transfer(van.address, "1 ether")
+        session.apply(cached_batch)
+        assert van.head == batch.hash
+
+
+def test_simulation_apply_optional_calls(singleton, van, owners):
+    # NOTE: No contract has a default function, so calling it w/ an unknown selector reverts
+    batch = (
+        van.new_batch()
+        .add_raw(singleton, success_required=False, data=b"\xde\xad\xbe\xef")
+        .add_raw(owners[0])
+    )
+
+    with SimulationSession(van) as session:
+        session.apply(batch)
+        assert van.head == batch.hash
+
+
+def test_upgraded_elsewhere(van, VERSION):
+    queue, contract = van.queue, van.contract
+    try:
+        # NOTE: As if the version was cached before someone else upgraded the Wallet
+        van.version = Version("0.0.1")
+        assert van.get_eip712_domain().version == "0.0.1"
+
+        assert van.refresh_state().version == VERSION
+        assert van.version == VERSION
+        assert van.get_eip712_domain().version == str(VERSION)
+        # NOTE: Re-created w/ the new version next time they are used
+        assert "contract" not in van.__dict__ and "queue" not in van.__dict__
+
+    finally:
+        van.queue, van.contract = queue, contract
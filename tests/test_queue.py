@@ -0,0 +1,345 @@
+import pytest
+from ape.types import HexBytes, MessageSignature
+from ape.utils import ZERO_ADDRESS
+from eip712 import EIP712Domain
+from eth_account import Account
+from packaging.version import Version
+from caravan.messages import Execute
+from caravan.queue import QueueItem, QueueManager
+from caravan.storage import DirectoryStorage, QueueStorage, SQLiteStorage, migrate
+
+BASE = HexBytes(b"\x00" * 32)
+
+
+def new_item(
+    parent: HexBytes, nonce: int = 0, address: str = ZERO_ADDRESS
+) -> QueueItem:
+    # NOTE: Use `Execute` directly to avoid parametrized fixture setup
+    msg = Execute.new(
+        parent=parent,
+        version=Version("0.1"),
+        address=address,
+        chain_id=1,
+    )
+    for _ in range(nonce):
+        msg.add_raw(ZERO_ADDRESS)
+
+    return QueueItem(message=msg)
+
+
+def new_queue(size: int) -> QueueManager:
+    queue = QueueManager(base=BASE)
+
+    parent = BASE
+    for _ in range(size):
+        queue.add(item := new_item(parent))
+        parent = item.hash
+
+    return queue
+
+
+def test_index():
+    queue = QueueManager(base=BASE)
+    queue.add(a := new_item(BASE))
+    queue.add(b := new_item(a.hash))
+    queue.add(c := new_item(a.hash, nonce=1))
+    # NOTE: Sibling of `a`
+    queue.add(d := new_item(BASE, nonce=1))
+
+    assert a.hash in queue and b.message in queue and c in queue
+    assert queue.find(b.hash) is b
+    assert queue.parent(b) is a
+    assert queue.children(BASE) == [a, d]
+    assert queue.children(a) == [b, c]
+    assert queue.queue[a] == [b.hash, c.hash]
+    assert queue.get_branch(c.hash) == (a, c)
+
+    with pytest.raises(IndexError):
+        queue.add(a)
+
+    with pytest.raises(IndexError):
+        # NOTE: Parent is not in queue
+        queue.add(new_item(HexBytes(b"\x01" * 32)))
+
+    assert queue.rebase(a.hash) == 2  # `a` and `d`
+    assert queue.base == a.hash
+    assert a not in queue and d not in queue
+    assert queue.children(a.hash) == [b, c]
+    assert queue.children(BASE) == []
+
+    # NOTE: Validation re-creates index from linked structure
+    assert QueueManager(queue=queue.queue, base=a.hash).children(a.hash) == [b, c]
+
+
+def test_load_domain(tmp_path):
+    other_wallet = "0x" + "11" * 20
+    queue = QueueManager(base=BASE)
+    queue.add(a := new_item(BASE))
+    queue.add(b := new_item(a.hash))
+    queue.add(other := new_item(BASE, address=other_wallet))
+    queue.save(tmp_path)
+
+    # NOTE: Corrupting another wallet's queue should not affect loading this one
+    (tmp_path / other.message._eip712_domain_.separator.hex() / "junk").touch()
+
+    domain = EIP712Domain(
+        name="Caravan Wallet",
+        verifyingContract=ZERO_ADDRESS,
+        version="0.1",
+        chainId=1,
+    )
+    loaded = QueueManager.load(base=BASE, path=tmp_path, domains=[domain])
+    assert loaded.size == 2
+    assert other.hash not in loaded
+
+    # NOTE: Nothing is parsed until accessed
+    assert a.hash in loaded and len(loaded.queue) == 0
+    assert loaded.children(BASE) == [a]
+    assert len(loaded.queue) == 1
+
+    # NOTE: Rebasing does not require parsing stale items
+    assert loaded.rebase(a.hash) == 1
+    assert loaded.find(b.hash) == b
+    assert loaded.get_branch(b.hash) == (b,)
+
+
+def test_parallel_load(tmp_path):
+    signer = Account.create()
+    queue = QueueManager(base=BASE)
+
+    def sign(account) -> MessageSignature:
+        signed = account.sign_message(item.message.signable_message)
+        return MessageSignature(
+            v=signed.v, r=signed.r.to_bytes(32, "big"), s=signed.s.to_bytes(32, "big")
+        )
+
+    parent = BASE
+    for nonce in range(20):
+        item = new_item(parent, nonce=nonce % Execute.MAX_CALLS)
+        item.signatures[signer.address] = sign(signer)
+        queue.add(item)
+        parent = item.hash
+
+    queue.save(tmp_path)
+
+    serial = QueueManager.load(base=BASE, path=tmp_path)
+    parallel = QueueManager.load(base=BASE, path=tmp_path, workers=2)
+    assert parallel.queue == serial.queue == queue.queue
+
+    # NOTE: Corrupt a signature, and make sure we get the same error either way
+    signature_file = next(tmp_path.glob(f"*/{item.hash.hex()}/signatures/*"))
+    signature_file.write_bytes(sign(Account.create()).encode_rsv())
+
+    with pytest.raises(RuntimeError) as serial_error:
+        QueueManager.load(base=BASE, path=tmp_path)
+
+    with pytest.raises(RuntimeError) as parallel_error:
+        QueueManager.load(base=BASE, path=tmp_path, workers=2)
+
+    assert str(parallel_error.value) == str(serial_error.value)
+
+
+def test_sqlite_storage(tmp_path):
+    queue = QueueManager(base=BASE)
+    queue.add(a := new_item(BASE))
+    queue.add(b := new_item(a.hash))
+    queue.add(other := new_item(BASE, address="0x" + "11" * 20))
+    queue.save(folder := tmp_path / "queue")
+
+    storage = QueueStorage.from_path(database := tmp_path / "queue.db")
+    assert isinstance(storage, SQLiteStorage)
+    assert migrate(QueueStorage.from_path(folder), storage) == 3
+
+    loaded = QueueManager.load(base=BASE, path=database)
+    assert loaded.queue == queue.queue
+
+    domain = a.message._eip712_domain_
+    loaded = QueueManager.load(base=BASE, path=database, domains=[domain])
+    assert loaded.size == 2 and other.hash not in loaded
+
+    # NOTE: Saves back to the same database by default
+    loaded.add(c := new_item(b.hash))
+    loaded.save()
+    assert QueueManager.load(base=BASE, path=database).find(c.hash) == c
+
+
+def test_zip_storage(tmp_path):
+    queue = new_queue(10)
+    queue.add(other := new_item(BASE, address="0x" + "11" * 20))
+    queue.save(archive := tmp_path / "queue.zip")
+    assert archive.is_file()
+
+    assert QueueManager.load(base=BASE, path=archive).queue == queue.queue
+    assert QueueManager.load(base=BASE, path=archive, workers=2).queue == queue.queue
+
+    domain = other.message._eip712_domain_
+    loaded = QueueManager.load(base=BASE, path=archive, domains=[domain])
+    assert loaded.size == 1 and len(loaded.queue) == 0
+
+    # NOTE: Archive is not re-written if nothing changed (re-writing replaces the file)
+    inode = archive.stat().st_ino
+    loaded.save()
+    assert archive.stat().st_ino == inode
+
+    # NOTE: Archive is re-written w/ the new item, keeping the rest
+    loaded.add(new_item(other.hash, address="0x" + "11" * 20))
+    loaded.save()
+    assert QueueManager.load(base=BASE, path=archive).size == 12
+
+
+@pytest.mark.parametrize("path", ["queue.db", "queue.zip"])
+def test_load_missing_file(tmp_path, path):
+    # NOTE: e.g. `CARAVAN_QUEUE_PATH` on a fresh setup
+    queue = QueueManager.load(base=BASE, path=(path := tmp_path / path))
+    assert queue.size == 0 and not path.exists()
+
+    queue.add(a := new_item(BASE))
+    queue.save()
+    assert QueueManager.load(base=BASE, path=path).find(a.hash) == a
+
+
+@pytest.mark.parametrize("path", ["queue", "queue.db", "queue.zip"])
+def test_incremental_save(tmp_path, monkeypatch, path):
+    queue = new_queue(10)
+    queue.save(path := tmp_path / path)
+
+    saved = []
+    storage_save = (Storage := QueueStorage.from_path(path).__class__).save
+
+    def save(self, items, signatures=()):
+        saved.append((list(items), list(signatures)))
+        return storage_save(self, items, signatures=signatures)
+
+    monkeypatch.setattr(Storage, "save", save)
+
+    loaded = QueueManager.load(base=BASE, path=path)
+    loaded.save()
+    assert saved.pop() == ([], [])
+
+    head = next(item for item, children in loaded.queue.items() if not children)
+    loaded.add(item := new_item(head.hash))
+    signer = Account.create()
+    signed = signer.sign_message(head.message.signable_message)
+    signature = MessageSignature(
+        v=signed.v, r=signed.r.to_bytes(32, "big"), s=signed.s.to_bytes(32, "big")
+    )
+    loaded.add_confirmations(head.hash, {signer.address: signature})
+    loaded.save()
+    assert saved.pop() == ([item], [(head, {signer.address})])
+
+    reloaded = QueueManager.load(base=BASE, path=path)
+    assert reloaded.find(head.hash).signatures == {signer.address: signature}
+    assert reloaded.find(item.hash) == item
+
+    # NOTE: Saving somewhere else writes everything
+    loaded.save(other_path := tmp_path / "other")
+    assert isinstance(QueueStorage.from_path(other_path), DirectoryStorage)
+    assert QueueManager.load(base=BASE, path=other_path).size == 11
+
+
+@pytest.mark.parametrize("path", ["queue", "queue.db", "queue.zip"])
+def test_compact(tmp_path, path):
+    queue = QueueManager(base=BASE)
+    queue.add(a := new_item(BASE))
+    queue.add(b := new_item(a.hash))
+    queue.add(c := new_item(b.hash))
+    # NOTE: Siblings superseded by `a` and `b`
+    queue.add(d := new_item(BASE, nonce=1))
+    queue.add(e := new_item(a.hash, nonce=1))
+    queue.save(path := tmp_path / path)
+
+    # NOTE: `b` was executed on-chain
+    loaded = QueueManager.load(base=b.hash, path=path)
+    assert loaded.size == 5
+    assert loaded.compact()[0] == 4  # `a`, `b`, `d` and `e`
+
+    reloaded = QueueManager.load(base=BASE, path=path)
+    assert reloaded.size == 1 and reloaded.find(c.hash) == c
+    assert not any(item.hash in reloaded for item in (a, b, d, e))
+
+    # NOTE: Nothing left to compact
+    assert QueueManager.load(base=b.hash, path=path).compact() == (0, 0)
+
+
+def test_compact_migrated(tmp_path):
+    queue = QueueManager(base=BASE)
+    queue.add(upgrade := new_item(BASE))
+    # NOTE: Messages after the migration use the new version's domain
+    msg = Execute.new(
+        parent=upgrade.hash, version=Version("0.2"), address=ZERO_ADDRESS, chain_id=1
+    )
+    queue.add(executed := QueueItem(message=msg))
+    queue.save(tmp_path)
+
+    old_domain = upgrade.message._eip712_domain_
+    new_domain = executed.message._eip712_domain_
+
+    # NOTE: Loading only the current version misses `upgrade`, so it must be loaded too
+    assert (
+        QueueManager.load(base=executed.hash, path=tmp_path, domains=[new_domain]).size
+        == 1
+    )
+    loaded = QueueManager.load(
+        base=executed.hash, path=tmp_path, domains=[old_domain, new_domain]
+    )
+    assert loaded.compact()[0] == 2
+    assert QueueManager.load(base=BASE, path=tmp_path).size == 0
+
+
+@pytest.fixture(scope="module")
+def large_queue() -> QueueManager:
+    return new_queue(10_000)
+
+
+class ScanCountingDict(dict):
+    """Counts every full scan of the dict (lookups by key are not counted)"""
+
+    scans = 0
+
+    def __iter__(self):
+        ScanCountingDict.scans += 1
+        return super().__iter__()
+
+    def keys(self):
+        ScanCountingDict.scans += 1
+        return super().keys()
+
+    def values(self):
+        ScanCountingDict.scans += 1
+        return super().values()
+
+    def items(self):
+        ScanCountingDict.scans += 1
+        return super().items()
+
+
+def test_lookup_scaling(monkeypatch, large_queue):
+    itemhashes = [item.hash for item in large_queue.queue][-100:]
+
+    monkeypatch.setattr(large_queue, "queue", ScanCountingDict(large_queue.queue))
+    ScanCountingDict.scans = 0
+    for itemhash in itemhashes:
+        large_queue.find(itemhash)
+        large_queue.children(itemhash)
+        assert itemhash in large_queue
+        assert large_queue.find(itemhash) in large_queue
+
+    # NOTE: Lookups must only use the indexes, never scan the whole queue
+    assert ScanCountingDict.scans == 0
+
+
+def test_deep_branch(large_queue):
+    queue = large_queue.model_copy(deep=True)
+    queue._reindex()  # NOTE: Private indexes are not deep-copied
+
+    head = next(item for item, children in queue.queue.items() if not children)
+    assert len(branch := queue.get_branch(head.hash)) == 10_000
+    assert branch[-1] == head and branch[0].parent == BASE
+    assert queue.get_branch(head.hash) is branch
+
+    # NOTE: Computing the branch of a descendant re-uses the cached branch
+    queue.add(child := new_item(head.hash))
+    assert queue.get_branch(child.hash) == (*branch, child)
+
+    assert queue.rebase(branch[4_999].hash) == 5_000
+    assert queue.get_branch(child.hash) == (*branch[5_000:], child)
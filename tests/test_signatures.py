@@ -0,0 +1,76 @@
+from ape.types import MessageSignature
+from ape.utils import ZERO_ADDRESS
+from eth_account import Account
+from packaging.version import Version
+from caravan.messages import Execute
+from caravan.planner import plan_approvals, signature_gas
+from caravan.queue import QueueItem
+from caravan.signatures import SIGNATURE_CACHE, SignatureCache
+
+
+def sign(account, msg) -> MessageSignature:
+    signed = account.sign_message(msg.signable_message)
+    return MessageSignature(
+        v=signed.v, r=signed.r.to_bytes(32, "big"), s=signed.s.to_bytes(32, "big")
+    )
+
+
+def test_signature_cache(tmp_path):
+    msg = Execute.new(
+        parent=b"\x00" * 32,
+        version=Version("0.1"),
+        address=ZERO_ADDRESS,
+        chain_id=1,
+    )
+    signers = [Account.create() for _ in range(3)]
+    signatures = {signer.address: sign(signer, msg) for signer in signers}
+
+    SIGNATURE_CACHE.clear()
+    item = QueueItem(message=msg, signatures=signatures)
+    assert len(SIGNATURE_CACHE) == 3
+
+    (item_folder := tmp_path / msg.hash.hex()).mkdir()
+    item.save(item_folder)
+    assert QueueItem.load(item_folder, msg._eip712_domain_) == item
+    # NOTE: Re-verifying the same signatures does not recover them again
+    assert len(SIGNATURE_CACHE) == 3
+
+    cache = SignatureCache(maxsize=2)
+    for signer, signature in signatures.items():
+        assert cache.recover_signer(msg.hash, signature) == signer
+    assert len(cache) == 2
+
+    cache.persist(path := tmp_path / ".signatures.json")
+    cache.save()
+
+    (cold_cache := SignatureCache()).persist(path)
+    assert len(cold_cache) == 2
+    assert cold_cache._cache == cache._cache
+
+
+def test_plan_approvals():
+    msg = Execute.new(
+        parent=b"\x00" * 32,
+        version=Version("0.1"),
+        address=ZERO_ADDRESS,
+        chain_id=1,
+    )
+    a, b, c, outsider = (Account.create() for _ in range(4))
+    signers = [a.address, b.address, c.address]
+    signatures = {s.address: sign(s, msg) for s in (a, b, c, outsider)}
+
+    # NOTE: Pre-approvals are used first, and never re-sent as signatures
+    plan = plan_approvals(2, signers, [a.address], signatures)
+    assert plan.missing == 0 and plan.approvals == [a.address]
+    assert len(plan.signatures) == 1 and a.address not in plan.signatures
+    assert outsider.address in plan.skipped and a.address in plan.skipped
+    assert plan.gas_saved == sum(signature_gas(s) for s in plan.skipped.values())
+
+    # NOTE: No signatures needed at all
+    plan = plan_approvals(2, signers, [a.address, b.address], signatures)
+    assert plan.signatures == {} and len(plan.skipped) == 4
+
+    plan = plan_approvals(
+        3, signers, [], {outsider.address: signatures[outsider.address]}
+    )
+    assert plan.missing == 3